@@ -0,0 +1,246 @@
+import asyncio
+import hashlib
+import itertools
+import logging
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+import metrics
+from retrieval import tokenize
+
+logger = logging.getLogger(__name__)
+
+# -----------------------------------------------------------------------------
+# Answer Cache Configuration
+# -----------------------------------------------------------------------------
+
+# "memory" serves near-duplicate first questions from earlier answers; "off" disables it
+ANSWER_CACHE_BACKEND = os.getenv("ANSWER_CACHE_BACKEND", "off")
+# Jaccard similarity of the questions' word shingles needed to reuse an answer
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.7"))
+ANSWER_CACHE_TTL_SECONDS = float(os.getenv("ANSWER_CACHE_TTL_SECONDS", "86400"))
+ANSWER_CACHE_MAX_ITEMS = int(os.getenv("ANSWER_CACHE_MAX_ITEMS", "2000"))
+# Share of hits answered by the model anyway and compared with the cached answer
+ANSWER_CACHE_AUDIT_RATE = float(os.getenv("ANSWER_CACHE_AUDIT_RATE", "0.02"))
+# An audited answer sharing less than this with the cached one counts as a false hit
+ANSWER_CACHE_AUDIT_MIN_SIMILARITY = float(os.getenv("ANSWER_CACHE_AUDIT_MIN_SIMILARITY", "0.2"))
+
+# MinHash signature length and its split into LSH bands. Questions become
+# candidates when all rows of any band agree, which with 16 bands of 4 rows
+# happens for 99% of pairs at similarity 0.7 and 12% at 0.3.
+_PERMUTATIONS = 64
+_BANDS = 16
+_PRIME = (1 << 31) - 1
+# Characters per update when a cached answer is replayed
+_REPLAY_CHARS = 64
+
+# -----------------------------------------------------------------------------
+# Shingling and MinHash
+# -----------------------------------------------------------------------------
+
+def shingles(text):
+    """Word unigrams and bigrams of text, without stopwords and plural endings.
+
+    Bigrams keep word order in play, so "home insurance covering floods" and
+    "flood insurance covering homes" do not look alike.
+    """
+    words = [w[:-1] if len(w) > 3 and w.endswith("s") else w for w in tokenize(text or "")]
+    return frozenset(itertools.chain(words, (f"{a} {b}" for a, b in zip(words, words[1:]))))
+
+def jaccard(a, b):
+    return len(a & b) / len(a | b) if a or b else 0.0
+
+class MinHasher:
+    """MinHash signatures over shingle sets, from seeded universal hash functions."""
+
+    def __init__(self, permutations=_PERMUTATIONS, seed=1):
+        rng = random.Random(seed)
+        self.a = np.array([rng.randrange(1, _PRIME) for _ in range(permutations)], dtype=np.uint64)
+        self.b = np.array([rng.randrange(0, _PRIME) for _ in range(permutations)], dtype=np.uint64)
+
+    def signature(self, shingle_set):
+        values = np.array(
+            [int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "little") % _PRIME
+             for s in shingle_set],
+            dtype=np.uint64,
+        )
+        # Values and coefficients are below 2**31, so the products fit in 64 bits
+        return ((np.outer(self.a, values) + self.b[:, None]) % _PRIME).min(axis=1)
+
+# -----------------------------------------------------------------------------
+# Answer Cache
+# -----------------------------------------------------------------------------
+
+class CachedAnswer:
+    __slots__ = ("id", "language", "question", "shingles", "bands", "answer", "stored_at")
+
+    def __init__(self, entry_id, language, question, shingle_set, bands, answer, stored_at):
+        self.id = entry_id
+        self.language = language
+        self.question = question
+        self.shingles = shingle_set
+        self.bands = bands
+        self.answer = answer
+        self.stored_at = stored_at
+
+class AnswerCache:
+    """Chat answers found again by question similarity, per language.
+
+    Questions are indexed by the bands of their MinHash signature, so a
+    lookup only compares the few stored questions sharing a band; those are
+    then checked against threshold with their exact shingle similarity.
+    Entries expire after ttl and the least recently used are dropped beyond
+    max_items. A sample of hits (audit_rate) is answered fresh instead, and
+    the two answers are compared to estimate how often hits are wrong.
+    """
+
+    def __init__(self, threshold=ANSWER_CACHE_THRESHOLD, ttl=ANSWER_CACHE_TTL_SECONDS,
+                 max_items=ANSWER_CACHE_MAX_ITEMS, audit_rate=ANSWER_CACHE_AUDIT_RATE,
+                 audit_min_similarity=ANSWER_CACHE_AUDIT_MIN_SIMILARITY, clock=time.monotonic):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_items = max_items
+        self.audit_rate = audit_rate
+        self.audit_min_similarity = audit_min_similarity
+        self._clock = clock
+        self._hasher = MinHasher()
+        self._entries = OrderedDict()
+        self._buckets = {}
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _bands(self, language, shingle_set):
+        signature = self._hasher.signature(shingle_set)
+        rows = len(signature) // _BANDS
+        return [(language, band, signature[band * rows:(band + 1) * rows].tobytes()) for band in range(_BANDS)]
+
+    def get(self, language, question):
+        """The closest cached answer to question at or above threshold, or None."""
+        shingle_set = shingles(question)
+        if not shingle_set:
+            return None
+        bands = self._bands(language, shingle_set)
+        now = self._clock()
+        with self._lock:
+            best, best_similarity = None, self.threshold
+            for entry_id in set().union(*(self._buckets.get(band, ()) for band in bands)):
+                entry = self._entries[entry_id]
+                if now - entry.stored_at > self.ttl:
+                    self._remove(entry)
+                    continue
+                similarity = jaccard(shingle_set, entry.shingles)
+                if similarity >= best_similarity:
+                    best, best_similarity = entry, similarity
+            if best is None:
+                self.misses += 1
+                LOOKUPS.labels("miss").inc()
+                return None
+            self._entries.move_to_end(best.id)
+            self.hits += 1
+            LOOKUPS.labels("hit").inc()
+        SIMILARITY.observe(best_similarity)
+        return best
+
+    def sample_audit(self):
+        """Whether this hit should be answered by the model and checked."""
+        return random.random() < self.audit_rate
+
+    def put(self, language, question, answer, replaces=None):
+        """Cache answer for question; replaces is an audited hit for the same question."""
+        shingle_set = shingles(question)
+        if not shingle_set or not answer:
+            return
+        if replaces is not None:
+            self._audit(replaces, question, answer)
+        entry = CachedAnswer(next(self._ids), language, question, shingle_set,
+                             self._bands(language, shingle_set), answer, self._clock())
+        with self._lock:
+            if replaces is not None and replaces.id in self._entries:
+                self._remove(replaces)
+            self._entries[entry.id] = entry
+            for band in entry.bands:
+                self._buckets.setdefault(band, set()).add(entry.id)
+            while len(self._entries) > self.max_items:
+                self._remove(next(iter(self._entries.values())))
+
+    def _audit(self, entry, question, answer):
+        similarity = jaccard(shingles(answer), shingles(entry.answer))
+        AUDIT_SIMILARITY.observe(similarity)
+        false_hit = similarity < self.audit_min_similarity
+        AUDITS.labels("false_hit" if false_hit else "ok").inc()
+        if false_hit:
+            logger.info(
+                "Answer cache false hit: %r was served the answer to %r (answer similarity %.2f)",
+                question, entry.question, similarity
+            )
+
+    def _remove(self, entry):
+        del self._entries[entry.id]
+        for band in entry.bands:
+            bucket = self._buckets.get(band)
+            if bucket is not None:
+                bucket.discard(entry.id)
+                if not bucket:
+                    del self._buckets[band]
+
+    def stats(self):
+        """Hit/miss counters and current size."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "items": len(self._entries),
+        }
+
+async def replay(answer, chars=_REPLAY_CHARS):
+    """Yield a cached answer in pieces, like the fragments of a completion stream."""
+    for start in range(0, len(answer), chars):
+        yield answer[start:start + chars]
+        # Let other streams run between updates, as a network stream would
+        await asyncio.sleep(0)
+
+def create_answer_cache(backend=ANSWER_CACHE_BACKEND):
+    """Build the configured answer cache, or None when it is off."""
+    if backend == "off":
+        return None
+    if backend == "memory":
+        return AnswerCache()
+    raise ValueError(f"Unknown ANSWER_CACHE_BACKEND: {backend}")
+
+# -----------------------------------------------------------------------------
+# Answer Cache Metrics
+# -----------------------------------------------------------------------------
+
+LOOKUPS = metrics.counter("insurebot_answer_cache_lookups", "Chat answer cache lookups.", ("result",))
+SIMILARITY = metrics.histogram(
+    "insurebot_answer_cache_hit_similarity", "Question similarity of answer cache hits.",
+    buckets=(0.5, 0.6, 0.7, 0.75, 0.8, 0.85, 0.9, 0.95, 1)
+)
+AUDITS = metrics.counter(
+    "insurebot_answer_cache_audits", "Sampled cache hits answered fresh and compared.", ("outcome",)
+)
+AUDIT_SIMILARITY = metrics.histogram(
+    "insurebot_answer_cache_audit_similarity", "Similarity of a fresh answer to the cached one it audits.",
+    buckets=(0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1)
+)
+
+def register_metrics(cache):
+    metrics.gauge(
+        "insurebot_answer_cache_items", "Chat answers held in the cache.",
+        callback=lambda: {(): len(cache)},
+    )
+    metrics.gauge(
+        "insurebot_answer_cache_hit_ratio", "Share of answer cache lookups served from the cache.",
+        callback=lambda: {(): cache.stats()["hit_rate"]},
+    )
@@ -1,10 +1,18 @@
+import asyncio
+import gc
+from contextlib import asynccontextmanager
+
 import gradio as gr
 from utils import (
-    custom_theme, TRANSLATIONS, INSURANCE_TYPES, CURRENCY_MAP,
-    chat_with_bot_stream, process_input, generate_policy_recommendation,
-    update_budget_slider, update_ui_language, use_example
+    custom_theme, TRANSLATIONS, INSURANCE_TYPES, CURRENCY_MAP, get_llm_client,
+    chat_with_bot_stream, process_input, prefetch_attachments, generate_policy_recommendation,
+    update_budget_slider, update_ui_language, use_example, client_side_js, insurance_type_choices,
+    discard_session, new_conversation, resume_conversation, load_earlier_turns, history_db
 )
-from static import JS_ANIMATE, JS_THEME, STYLE, THEME_RESET_SCRIPT
+import assets
+from static import JS_APPLY_TRANSCRIPT_DELTA, JS_ATTACHED_FILES
+from tts import TTS_CACHE_DIR
+import metrics
 
 # ----------------------------------------------------------------------------- 
 # UI Construction 
@@ -12,9 +20,8 @@ from static import JS_ANIMATE, JS_THEME, STYLE, THEME_RESET_SCRIPT
 
 def create_ui():
     """Build the Gradio interface and layout."""
-    with gr.Blocks(js=JS_ANIMATE, theme=custom_theme) as demo:
-        gr.HTML(STYLE)
-        gr.HTML(THEME_RESET_SCRIPT)
+    # Styles and scripts are served as cached static files, not inlined into the page
+    with gr.Blocks(js=assets.page_js(), head=assets.page_head(), theme=custom_theme) as demo:
         
         # Language selection
         with gr.Row(elem_id="language-container"):
@@ -31,7 +38,7 @@ def create_ui():
                 fn=lambda: None,
                 inputs=[],
                 outputs=[],
-                js=JS_THEME
+                js=assets.theme_toggle_js()
             )
             
         with gr.Tabs() as tabs:
@@ -42,7 +49,44 @@ def create_ui():
                     <h3 class="subtitle">Discuss your insurance needs and get personalized policy recommendations!</h3>
                 """)
                 
-                chatbot = gr.Chatbot(label="Insurance Advisor Chatbot")
+                # Older turns of a resumed conversation are fetched a page at a time
+                earlier_button = gr.Button(
+                    TRANSLATIONS["🇬🇧 English"]["earlier_messages"],
+                    visible=False,
+                    size="sm",
+                    elem_id="earlier-messages"
+                )
+                chatbot = gr.Chatbot(label="Insurance Advisor Chatbot", type="messages")
+                # Durable id of this browser's conversation. It is a random key,
+                # not a credential, so the storage secret can be fixed.
+                conversation_id = gr.BrowserState(None, storage_key="insurebot-conversation", secret="insurebot")
+                # The transcript is kept on the server; each chat update carries
+                # only the current turn's messages, applied to the chatbot in the browser
+                transcript_delta = gr.JSON(visible=False)
+                transcript_delta.change(
+                    fn=None,
+                    inputs=[transcript_delta, chatbot],
+                    outputs=[chatbot],
+                    js=JS_APPLY_TRANSCRIPT_DELTA,
+                    queue=False,
+                    show_progress="hidden"
+                )
+                # Clearing the chatbot starts a new conversation on the server too
+                chatbot.clear(
+                    fn=new_conversation,
+                    inputs=None,
+                    outputs=[conversation_id],
+                    queue=False,
+                    show_progress="hidden"
+                )
+                if history_db is not None:
+                    earlier_button.click(
+                        fn=load_earlier_turns,
+                        inputs=None,
+                        outputs=[transcript_delta, earlier_button],
+                        queue=False,
+                        show_progress="hidden"
+                    )
                 user_input = gr.MultimodalTextbox(
                     interactive=True,
                     file_count="multiple",
@@ -95,6 +139,26 @@ def create_ui():
                 fr_ex3.click(fn=use_example, inputs=[fr_ex3], outputs=[user_input])
                 fr_ex4.click(fn=use_example, inputs=[fr_ex4], outputs=[user_input])
                 
+                # Start parsing and transcribing attachments while the user is still typing.
+                # Keystrokes only update the file list in the browser; the server is
+                # called when the list itself changes.
+                attached_files = gr.JSON(visible=False)
+                user_input.change(
+                    fn=None,
+                    inputs=[user_input],
+                    outputs=[attached_files],
+                    js=JS_ATTACHED_FILES,
+                    queue=False,
+                    show_progress="hidden"
+                )
+                attached_files.change(
+                    fn=prefetch_attachments,
+                    inputs=[user_input, language_dropdown],
+                    outputs=None,
+                    queue=False,
+                    show_progress="hidden"
+                )
+                
                 # Chain of functions to process user input and produce responses
                 user_input.submit(
                     fn=lambda _: gr.update(interactive=False, submit_btn=False),
@@ -102,9 +166,12 @@ def create_ui():
                     outputs=user_input
                 ).then(
                     fn=chat_with_bot_stream,
-                    inputs=[user_input, audio_button, language_dropdown, chatbot],
-                    outputs=chatbot,
-                    api_name="bot_response"
+                    inputs=[user_input, audio_button, language_dropdown, conversation_id],
+                    outputs=[transcript_delta],
+                    show_progress_on=[chatbot],
+                    api_name="bot_response",
+                    # Async handler: streams share the event loop, not worker threads
+                    concurrency_limit=None
                 ).then(
                     fn=lambda _: "",
                     inputs=None,
@@ -130,7 +197,7 @@ def create_ui():
                             lines=4
                         )
                         insurance_type_dropdown = gr.Dropdown(
-                            choices=INSURANCE_TYPES["🇬🇧 English"],
+                            choices=insurance_type_choices("🇬🇧 English"),
                             value=INSURANCE_TYPES["🇬🇧 English"][0],
                             label="Insurance Type"
                         )
@@ -172,13 +239,21 @@ def create_ui():
                         )
                 
                 generate_btn = gr.Button("Generate Recommendation")
+                refresh_checkbox = gr.Checkbox(
+                    value=False,
+                    container=False,
+                    label="Regenerate (ignore saved recommendations)"
+                )
                 recommendation_output = gr.Markdown(label="Recommendation")
                 
-                # Update budget slider when currency changes
+                # Update budget slider when currency changes, in the browser
                 currency_dropdown.change(
-                    fn=update_budget_slider, 
-                    inputs=[currency_dropdown, language_dropdown], 
-                    outputs=[budget_slider]
+                    fn=None,
+                    inputs=[currency_dropdown, language_dropdown],
+                    outputs=[budget_slider],
+                    js=client_side_js(update_budget_slider, [budget_slider], list(CURRENCY_MAP), list(TRANSLATIONS)),
+                    queue=False,
+                    show_progress="hidden"
                 )
                 
                 # Generate recommendation when button is clicked
@@ -196,35 +271,57 @@ def create_ui():
                         policy_term_input,
                         num_people_slider,
                         currency_dropdown,
-                        language_dropdown
+                        language_dropdown,
+                        refresh_checkbox
                     ],
-                    outputs=recommendation_output
+                    outputs=recommendation_output,
+                    concurrency_limit=None
                 )
                 
-        # Language dropdown change handler - update UI elements
+        # Language dropdown change handler - update UI elements. Every language's
+        # updates are computed here once and applied in the browser, so
+        # switching languages costs no server call.
+        language_outputs = [
+            chat_tab,
+            policy_tab,
+            insurance_html,
+            policy_html,
+            user_input,
+            audio_button,
+            policy_details_input,
+            insurance_type_dropdown,
+            coverage_input,
+            currency_dropdown,
+            budget_slider,
+            num_people_slider,
+            policy_term_input,
+            generate_btn,
+            refresh_checkbox,
+            recommendation_output,
+            english_examples,
+            french_examples,
+            examples_header,
+            earlier_button
+        ]
         language_dropdown.change(
-            fn=update_ui_language,
-            inputs=[language_dropdown],
-            outputs=[
-                chat_tab,
-                policy_tab,
-                insurance_html,
-                policy_html,
-                user_input,
-                audio_button,
-                policy_details_input,
-                insurance_type_dropdown,
-                coverage_input,
-                currency_dropdown,
-                budget_slider,
-                num_people_slider,
-                policy_term_input,
-                generate_btn,
-                recommendation_output,
-                english_examples,
-                french_examples,
-                examples_header
-            ]
+            fn=None,
+            inputs=[language_dropdown, currency_dropdown],
+            outputs=language_outputs,
+            js=client_side_js(update_ui_language, language_outputs, list(TRANSLATIONS), list(CURRENCY_MAP)),
+            queue=False,
+            show_progress="hidden"
+        )
+        
+        # Free the conversation as soon as its tab is closed, ahead of idle eviction
+        demo.unload(discard_session)
+        
+        # Pick up the browser's saved conversation where it left off. Without
+        # persistence this only binds the id, so a session lost later is noticed.
+        demo.load(
+            fn=resume_conversation,
+            inputs=[conversation_id],
+            outputs=[conversation_id, transcript_delta, earlier_button],
+            show_progress="hidden"
         )
     
     return demo
@@ -233,9 +330,29 @@ def create_ui():
 # Main Entry Point 
 # -----------------------------------------------------------------------------
 
+@asynccontextmanager
+async def lifespan(app):
+    """Build the LLM client and open its connections on the server event loop before the first chat."""
+    llm_client = get_llm_client()
+    warm_up = asyncio.create_task(llm_client.warm_up())
+    yield
+    warm_up.cancel()
+    await llm_client.aclose()
+    if history_db is not None:
+        # Commit conversation updates still waiting for the next batch
+        await asyncio.to_thread(history_db.close)
+
 def main():
     demo = create_ui()
-    demo.launch()
+    # The modules and UI built so far live for the whole process; keep later
+    # collections from scanning them again
+    gc.freeze()
+    # Synthesized speech is served from the TTS cache directory
+    demo.launch(allowed_paths=[TTS_CACHE_DIR], prevent_thread_lock=True, app_kwargs={"lifespan": lifespan})
+    # Prometheus scrape endpoint and UI assets on the FastAPI app Gradio runs on
+    metrics.mount(demo.app)
+    assets.mount(demo.app)
+    demo.block_thread()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,153 @@
+import gzip
+import hashlib
+import os
+import re
+
+from static import JS_ANIMATE, JS_THEME, STYLE, THEME_RESET_SCRIPT
+
+# -----------------------------------------------------------------------------
+# Asset Configuration
+# -----------------------------------------------------------------------------
+
+# With assets off, the CSS and JavaScript are inlined into the page config
+ASSETS_ENABLED = os.getenv("ASSETS_ENABLED", "1") == "1"
+ASSETS_PATH = os.getenv("ASSETS_PATH", "/ui-assets")
+# Fingerprinted names change whenever the content does, so they never go stale
+ASSETS_MAX_AGE = 365 * 24 * 3600
+
+_STRING_RE = re.compile(r"""("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')""")
+
+# -----------------------------------------------------------------------------
+# Minification
+# -----------------------------------------------------------------------------
+
+def minify_css(css):
+    """Drop comments and insignificant whitespace, leaving quoted strings alone."""
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.DOTALL)
+    parts = _STRING_RE.split(css)
+    for i in range(0, len(parts), 2):
+        text = re.sub(r"\s+", " ", parts[i])
+        text = re.sub(r"\s*([{};,>])\s*", r"\1", text)
+        parts[i] = re.sub(r":\s+", ":", text)
+    return "".join(parts).replace(";}", "}").strip()
+
+def minify_js(js):
+    """Drop comments, indentation and blank lines.
+
+    Line breaks are kept, so automatic semicolon insertion is unaffected.
+    Strings and template literals are skipped; regex literals are not
+    recognized, so the source must not contain any with quotes or //.
+    """
+    out, i, n = [], 0, len(js)
+    while i < n:
+        c = js[i]
+        if c in "\"'`":
+            end = i + 1
+            while end < n and js[end] != c:
+                end += 2 if js[end] == "\\" else 1
+            out.append(js[i:end + 1])
+            i = end + 1
+        elif js.startswith("//", i):
+            i = js.find("\n", i)
+            i = n if i < 0 else i
+        elif js.startswith("/*", i):
+            end = js.find("*/", i + 2)
+            i = n if end < 0 else end + 2
+        else:
+            out.append(c)
+            i += 1
+    lines = (line.strip() for line in "".join(out).splitlines())
+    return "\n".join(line for line in lines if line)
+
+# -----------------------------------------------------------------------------
+# Fingerprinted Assets
+# -----------------------------------------------------------------------------
+
+class Asset:
+    """A minified file named by its content hash, kept plain and gzipped in memory."""
+
+    def __init__(self, stem, extension, content_type, text):
+        self.body = text.encode("utf-8")
+        digest = hashlib.sha256(self.body).hexdigest()[:12]
+        self.name = f"{stem}.{digest}.{extension}"
+        self.etag = f'"{digest}"'
+        self.content_type = content_type
+        self.gzipped = gzip.compress(self.body, 9, mtime=0)
+
+    @property
+    def url(self):
+        # Relative, so the page also works behind a proxy path prefix
+        return f"{ASSETS_PATH.strip('/')}/{self.name}"
+
+_assets = None
+
+def build():
+    """Minify and fingerprint the UI's stylesheet and script bundle, once per process."""
+    global _assets
+    if _assets is None:
+        css = Asset("insurebot", "css", "text/css; charset=utf-8", minify_css(STYLE))
+        js = Asset("insurebot", "js", "text/javascript; charset=utf-8",
+                   minify_js("\n".join((JS_ANIMATE, JS_THEME, THEME_RESET_SCRIPT))))
+        _assets = {"css": css, "js": js}
+    return _assets
+
+# -----------------------------------------------------------------------------
+# Page Integration
+# -----------------------------------------------------------------------------
+
+def page_head():
+    """HTML for the page head: asset links, or the inline styles and reset script."""
+    if not ASSETS_ENABLED:
+        return f"<style>{STYLE}</style><script>{THEME_RESET_SCRIPT}</script>"
+    built = build()
+    # The script is preloaded so it downloads while Gradio starts up
+    return (
+        f'<link rel="stylesheet" href="{built["css"].url}">'
+        f'<link rel="preload" href="{built["js"].url}" as="script">'
+    )
+
+def page_js():
+    """The Blocks load function: fetch the script bundle, then play the intro animation."""
+    if not ASSETS_ENABLED:
+        return JS_ANIMATE
+    return (
+        "() => new Promise((resolve) => {"
+        " const script = document.createElement('script');"
+        f" script.src = '{build()['js'].url}';"
+        " script.onload = () => { load_animate(); resolve(); };"
+        " script.onerror = () => resolve();"
+        " document.head.appendChild(script);"
+        " })"
+    )
+
+def theme_toggle_js():
+    return "() => toggleTheme()" if ASSETS_ENABLED else JS_THEME
+
+def mount(app, path=ASSETS_PATH):
+    """Serve the assets with long-lived caching, ETag revalidation and gzip."""
+    if not ASSETS_ENABLED:
+        return
+    from fastapi import Request
+    from fastapi.responses import Response
+
+    assets = {asset.name: asset for asset in build().values()}
+
+    def asset_endpoint(request: Request):
+        asset = assets.get(request.path_params["name"])
+        if asset is None:
+            return Response(status_code=404)
+        headers = {
+            "Cache-Control": f"public, max-age={ASSETS_MAX_AGE}, immutable",
+            "ETag": asset.etag,
+            "Vary": "Accept-Encoding",
+        }
+        tags = {tag.strip().removeprefix("W/") for tag in request.headers.get("if-none-match", "").split(",")}
+        if asset.etag in tags or "*" in tags:
+            return Response(status_code=304, headers=headers)
+        body = asset.body
+        if "gzip" in request.headers.get("accept-encoding", ""):
+            body = asset.gzipped
+            headers["Content-Encoding"] = "gzip"
+        return Response(body, media_type=asset.content_type, headers=headers)
+
+    app.add_api_route(path.rstrip("/") + "/{name}", asset_endpoint, methods=["GET"], include_in_schema=False)
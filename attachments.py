@@ -0,0 +1,129 @@
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# -----------------------------------------------------------------------------
+# Attachment Processing Configuration
+# -----------------------------------------------------------------------------
+
+# Audio transcription mostly waits on the recognizer, so it gets a wide pool
+ATTACH_IO_WORKERS = int(os.getenv("ATTACH_IO_WORKERS", "8"))
+# Document parsing burns CPU (PDFs fan out further onto their process pool)
+ATTACH_CPU_WORKERS = int(os.getenv("ATTACH_CPU_WORKERS", str(os.cpu_count() or 2)))
+ATTACH_TIMEOUT_SECONDS = float(os.getenv("ATTACH_TIMEOUT_SECONDS", "60"))
+# Files processed at upload but never sent are forgotten after this long
+ATTACH_PREFETCH_TTL_SECONDS = float(os.getenv("ATTACH_PREFETCH_TTL_SECONDS", "600"))
+
+AUDIO_EXTENSIONS = (".wav", ".mp3")
+DOCUMENT_EXTENSIONS = (".pdf", ".doc", ".docx", ".txt")
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".gif")
+
+_io_executor = ThreadPoolExecutor(max_workers=ATTACH_IO_WORKERS, thread_name_prefix="attach-io")
+_cpu_executor = ThreadPoolExecutor(max_workers=ATTACH_CPU_WORKERS, thread_name_prefix="attach-cpu")
+
+def file_kind(file_path):
+    """"audio", "document", "image" or None for an unsupported file."""
+    ext = os.path.splitext(file_path)[1].lower()
+    if ext in AUDIO_EXTENSIONS:
+        return "audio"
+    if ext in DOCUMENT_EXTENSIONS:
+        return "document"
+    if ext in IMAGE_EXTENSIONS:
+        return "image"
+    return None
+
+# -----------------------------------------------------------------------------
+# Background Jobs
+# -----------------------------------------------------------------------------
+
+class Attachment:
+    """One uploaded file being processed on the pool matching its kind.
+
+    The timeout applies from the moment the job starts running, so files
+    queued behind others on a busy pool are not penalized for the wait;
+    the wait for a start is itself limited to one more timeout.
+    """
+
+    def __init__(self, file_path, fn, *args):
+        self.file_path = file_path
+        self.kind = file_kind(file_path)
+        self.submitted = time.monotonic()
+        self.started = None
+        self._running = threading.Event()
+        executor = _io_executor if self.kind == "audio" else _cpu_executor
+        self.future = executor.submit(self._run, fn, args)
+
+    def _run(self, fn, args):
+        self.started = time.monotonic()
+        self._running.set()
+        try:
+            return fn(self.file_path, *args)
+        finally:
+            logger.info(
+                "Attachment %s (%s) processed in %.2fs after %.2fs queued",
+                os.path.basename(self.file_path), self.kind,
+                time.monotonic() - self.started, self.started - self.submitted,
+            )
+
+    def result(self, timeout=None):
+        """Wait for the result; raises TimeoutError if the job starts or runs too late."""
+        timeout = ATTACH_TIMEOUT_SECONDS if timeout is None else timeout
+        if not self._running.wait(timeout):
+            # Every worker is busy or stuck; the job stays queued in case the file is sent again
+            raise TimeoutError(f"{self.file_path} did not start within {timeout:g} seconds")
+        return self.future.result(timeout=max(self.started + timeout - time.monotonic(), 0))
+
+# -----------------------------------------------------------------------------
+# Per-Session Pending Work
+# -----------------------------------------------------------------------------
+
+class PendingAttachments:
+    """Attachment jobs of one chat session, started as soon as files are attached.
+
+    Jobs are keyed by file path and arguments, so the upload hook and the
+    submit path share a single job per file and whichever runs second just
+    waits for the result. The submit path releases the jobs it used; jobs
+    never claimed are dropped ttl seconds after they were started.
+    """
+
+    def __init__(self, ttl=ATTACH_PREFETCH_TTL_SECONDS):
+        self.ttl = ttl
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._jobs)
+
+    def start(self, file_path, fn, *args):
+        """Return the job for file_path, starting it if it is not running yet."""
+        key = (file_path,) + args
+        with self._lock:
+            self._expire()
+            job = self._jobs.get(key)
+            if job is None:
+                job = self._jobs[key] = Attachment(file_path, fn, *args)
+            return job
+
+    def retain(self, file_paths):
+        """Forget jobs for files that are no longer attached."""
+        keep = set(file_paths)
+        with self._lock:
+            for key in [key for key in self._jobs if key[0] not in keep]:
+                del self._jobs[key]
+            self._expire()
+
+    def release(self, file_paths):
+        """Forget jobs whose results have been used."""
+        done = set(file_paths)
+        with self._lock:
+            for key in [key for key in self._jobs if key[0] in done]:
+                del self._jobs[key]
+
+    def _expire(self):
+        cutoff = time.monotonic() - self.ttl
+        for key in [key for key, job in self._jobs.items() if job.submitted < cutoff]:
+            del self._jobs[key]
@@ -0,0 +1,150 @@
+"""
+Near-duplicate answer cache: match quality, lookup cost and time to answer.
+
+  matches   for pairs of questions that should share an answer (rewordings)
+            and pairs that must not (a different product, peril or risk),
+            how many the cache serves at --threshold
+  lookup    time per AnswerCache.get() against --items cached questions,
+            using the LSH bands versus comparing with every cached question
+  answer    time until the full answer is shown for a first question, through
+            utils.chat_with_bot_stream against a fake model streaming
+            --tokens tokens at --token-ms each, on a miss and on a hit
+
+Usage:
+    python benchmarks/bench_answer_cache.py [--threshold 0.7] [--items 2000] [--tokens 300] [--token-ms 10]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GROQ_API_KEY", "fake")
+
+import utils  # noqa: E402
+from answer_cache import AnswerCache, jaccard, shingles  # noqa: E402
+from session import ChatSession  # noqa: E402
+
+SAME = [
+    ("What are the benefits of term life insurance?", "benefits of term life insurance"),
+    ("What are the benefits of term life insurance?", "Term life insurance benefits?"),
+    ("How do I file a car insurance claim?", "how to file a claim for my car insurance"),
+    ("What is a deductible in health insurance?", "What's a deductible in health insurance"),
+    ("Does renters insurance cover theft?", "does renter insurance cover theft"),
+    ("How much does travel insurance cost?", "How much does travel insurance cost for a week?"),
+    ("Quels sont les avantages de l'assurance vie temporaire ?", "avantages assurance vie temporaire"),
+    ("Comment déclarer un sinistre auto ?", "comment déclarer un sinistre auto"),
+]
+DIFFERENT = [
+    ("What are the benefits of term life insurance?", "What are the benefits of whole life insurance?"),
+    ("Does home insurance cover floods?", "Does flood insurance cover homes?"),
+    ("Does renters insurance cover theft?", "Does renters insurance cover fire?"),
+    ("How do I file a car insurance claim?", "How do I cancel my car insurance?"),
+    ("What is a deductible in health insurance?", "What is a deductible in dental insurance?"),
+    ("How much does travel insurance cost?", "How much does pet insurance cost?"),
+    ("Comment déclarer un sinistre auto ?", "Comment déclarer un sinistre habitation ?"),
+]
+WORDS = ("auto home life health travel pet dental renters flood fire theft claim premium deductible "
+         "coverage policy cancel renew quote cost family senior student business liability").split()
+
+
+class FakeStream:
+    def __init__(self, tokens, token_seconds):
+        self.tokens = tokens
+        self.token_seconds = token_seconds
+
+    def __aiter__(self):
+        return self._chunks()
+
+    async def _chunks(self):
+        for i in range(self.tokens):
+            await asyncio.sleep(self.token_seconds)
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=f"word{i} "))])
+
+
+class FakeCompletions:
+    def __init__(self, tokens, token_seconds):
+        self.tokens = tokens
+        self.token_seconds = token_seconds
+
+    async def create(self, **kwargs):
+        return FakeStream(self.tokens, self.token_seconds)
+
+
+def measure_matches(args):
+    rows = []
+    for name, pairs in (("same", SAME), ("different", DIFFERENT)):
+        served = 0
+        for cached, asked in pairs:
+            cache = AnswerCache(threshold=args.threshold, audit_rate=0)
+            cache.put("language", cached, "answer")
+            served += cache.get("language", asked) is not None
+        rows.append((name, len(pairs), served))
+    return rows
+
+
+def measure_lookup(args):
+    rng = random.Random(0)
+    cache = AnswerCache(threshold=args.threshold, max_items=args.items, audit_rate=0)
+    questions = [" ".join(rng.sample(WORDS, rng.randint(3, 8))) for _ in range(args.items)]
+    for question in questions:
+        cache.put("language", question, "answer")
+    probes = [" ".join(rng.sample(WORDS, rng.randint(3, 8))) for _ in range(200)]
+
+    start = time.perf_counter()
+    for probe in probes:
+        cache.get("language", probe)
+    lsh = (time.perf_counter() - start) / len(probes)
+
+    stored = [shingles(question) for question in questions]
+    start = time.perf_counter()
+    for probe in probes:
+        probe_shingles = shingles(probe)
+        max(jaccard(probe_shingles, other) for other in stored)
+    scan = (time.perf_counter() - start) / len(probes)
+    return lsh, scan
+
+
+async def time_to_answer(question):
+    start = time.perf_counter()
+    async for _ in utils.chat_with_bot_stream({"text": question, "files": []}, False, "🇬🇧 English",
+                                              session=ChatSession()):
+        pass
+    return time.perf_counter() - start
+
+
+async def measure_answer(args):
+    utils.get_llm_client().client = SimpleNamespace(
+        chat=SimpleNamespace(completions=FakeCompletions(args.tokens, args.token_ms / 1000))
+    )
+    utils.answer_cache = AnswerCache(threshold=args.threshold, audit_rate=0)
+    miss = await time_to_answer("What are the benefits of term life insurance?")
+    hit = await time_to_answer("benefits of term life insurance")
+    return miss, hit
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threshold", type=float, default=0.7)
+    parser.add_argument("--items", type=int, default=2000, help="cached questions for the lookup timing")
+    parser.add_argument("--tokens", type=int, default=300, help="tokens per fake answer")
+    parser.add_argument("--token-ms", type=float, default=10, help="fake model time per token")
+    args = parser.parse_args()
+
+    print(f"{'pairs':<10} {'count':>6} {'served':>7}")
+    for name, count, served in measure_matches(args):
+        print(f"{name:<10} {count:>6} {served:>7}")
+
+    lsh, scan = measure_lookup(args)
+    print(f"\nlookup among {args.items} questions: LSH {lsh * 1e6:.0f} us, full scan {scan * 1e6:.0f} us")
+
+    miss, hit = asyncio.run(measure_answer(args))
+    print(f"\nfull answer shown after: miss {miss * 1000:.0f} ms, hit {hit * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Page weight and load time with inline versus served UI assets.
+
+Starts app.py twice in child processes, with ASSETS_ENABLED=0 (styles and
+scripts inlined into the page config, as before) and ASSETS_ENABLED=1
+(minified, fingerprinted files under /ui-assets). For each, a client that
+accepts gzip fetches the page and its assets as:
+
+  first    empty cache: the page and every asset
+  revisit  the page, plus a conditional GET per asset (answered 304)
+  cached   the page only; assets are fresh for a year (Cache-Control immutable)
+
+Reports bytes on the wire, requests, measured local fetch time and a
+modelled load time on a slow link (--kbps, --rtt-ms): one round trip for
+the page, one more if any assets are requested (the browser fetches them
+in parallel), plus transfer time.
+
+Usage:
+    python benchmarks/bench_assets.py [--runs 20] [--kbps 1600] [--rtt-ms 150]
+"""
+
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_groq import free_port  # noqa: E402
+
+ASSET_RE = re.compile(r"ui-assets/insurebot\.[0-9a-f]+\.(?:css|js)")
+
+
+def start_app(port, enabled):
+    env = dict(os.environ, PYTHONPATH=ROOT, GRADIO_SERVER_PORT=str(port), GRADIO_ANALYTICS_ENABLED="False",
+               ASSETS_ENABLED="1" if enabled else "0")
+    env.setdefault("GROQ_API_KEY", "fake")
+    env.setdefault("GROQ_BASE_URL", "http://127.0.0.1:9")
+    process = subprocess.Popen([sys.executable, "app.py"], cwd=ROOT, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 120
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/", timeout=1).status_code == 200:
+                # Routes added after launch may lag the page by a moment
+                time.sleep(0.5)
+                return process
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError("app did not start")
+
+
+def visit(client, base, cache):
+    """Load the page and its assets; cache maps asset URL to ETag and is filled in."""
+    wire, requests = 0, 1
+    page = client.get(base + "/")
+    wire += page.num_bytes_downloaded
+    for url in dict.fromkeys(ASSET_RE.findall(page.text)):
+        if cache.get(url) == "fresh":
+            continue
+        headers = {"If-None-Match": cache[url]} if url in cache else {}
+        response = client.get(f"{base}/{url}", headers=headers)
+        requests += 1
+        wire += response.num_bytes_downloaded
+        if response.status_code == 200:
+            cache[url] = response.headers["etag"]
+    return wire, requests
+
+
+def measure(port, args):
+    base = f"http://127.0.0.1:{port}"
+    results = {}
+    with httpx.Client(headers={"Accept-Encoding": "gzip"}) as client:
+        for mode in ("first", "revisit", "cached"):
+            times, wire, requests = [], 0, 0
+            for _ in range(args.runs):
+                cache = {}
+                if mode != "first":
+                    visit(client, base, cache)
+                    if mode == "cached":
+                        cache = {url: "fresh" for url in cache}
+                start = time.perf_counter()
+                wire, requests = visit(client, base, cache)
+                times.append(time.perf_counter() - start)
+            round_trips = 1 if requests == 1 else 2
+            modelled = round_trips * args.rtt_ms / 1000 + wire * 8 / (args.kbps * 1000)
+            results[mode] = (wire, requests, statistics.median(times), modelled)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--kbps", type=float, default=1600, help="modelled link bandwidth")
+    parser.add_argument("--rtt-ms", type=float, default=150, help="modelled round trip per request")
+    args = parser.parse_args()
+
+    print(f"{'assets':<7} {'visit':<8} {'bytes':>9} {'requests':>9} {'local (ms)':>11} {'modelled (ms)':>14}")
+    for enabled in (False, True):
+        port = free_port()
+        process = start_app(port, enabled)
+        try:
+            results = measure(port, args)
+        finally:
+            process.terminate()
+            process.wait()
+        for mode, (wire, requests, local, modelled) in results.items():
+            print(f"{'served' if enabled else 'inline':<7} {mode:<8} {wire:>9} {requests:>9} "
+                  f"{local * 1000:>11.1f} {modelled * 1000:>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
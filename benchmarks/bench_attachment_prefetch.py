@@ -0,0 +1,72 @@
+"""
+Submit-to-model latency for messages with attachments, with and without prefetch.
+
+Attaches generated policy PDFs, waits while the "user" types, then submits:
+
+  submit    files are processed only once the message is sent (the old path)
+  prefetch  utils.prefetch_attachments runs on attach, as the attached-files change
+            event does, so submit only waits for unfinished work
+
+The reported time is from submit until process_input returns, i.e. until the
+request to the model can be sent. Each pass uses its own documents and an
+empty document cache so nothing is served from earlier work.
+
+Usage:
+    python benchmarks/bench_attachment_prefetch.py [--docs 3] [--pages 200] [--typing 3]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import utils  # noqa: E402
+from doc_cache import DocumentCache  # noqa: E402
+from pdfgen import write_pdf  # noqa: E402
+from session import ChatSession  # noqa: E402
+
+
+def submit_latency(paths, typing, prefetch):
+    session = ChatSession()
+    message = {"files": paths, "text": "Which of these policies covers flood damage?"}
+    if prefetch:
+        utils.prefetch_attachments({"files": paths, "text": ""}, "🇬🇧 English", session)
+    time.sleep(typing)
+    start = time.perf_counter()
+    utils.process_input([], message, "🇬🇧 English", session)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=3, help="PDFs attached to the message")
+    parser.add_argument("--pages", type=int, default=200, help="pages per PDF")
+    parser.add_argument("--typing", type=float, default=3.0, help="seconds between attaching and submitting")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        # Start the PDF process pool so neither pass pays for spawning it
+        warmup = write_pdf(os.path.join(workdir, "warmup.pdf"), 1)
+        utils.document_cache = DocumentCache(directory=os.path.join(workdir, "cache_warmup"))
+        utils.read_file_content(warmup)
+
+        results = {}
+        for seed, mode in enumerate(("submit", "prefetch")):
+            paths = [
+                write_pdf(os.path.join(workdir, f"{mode}_{i}.pdf"), args.pages, seed=seed * 100 + i)
+                for i in range(args.docs)
+            ]
+            utils.document_cache = DocumentCache(directory=os.path.join(workdir, f"cache_{mode}"))
+            results[mode] = submit_latency(paths, args.typing, mode == "prefetch")
+
+    print(f"{args.docs} PDFs x {args.pages} pages, {args.typing:g}s of typing")
+    print(f"{'mode':<9} {'submit to model (s)':>20}")
+    for mode, elapsed in results.items():
+        print(f"{mode:<9} {elapsed:>20.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Bytes and seconds of audio saved by stt.preprocess_audio.
+
+For each recording, compares what used to reach the recognizer (the file's
+PCM at its native rate and channel count) with the 16 kHz mono, silence
+trimmed audio produced by the preprocessing stage, and times the stage.
+
+Pass your own recordings (MP3 needs ffmpeg). Without files a sample set of
+44.1 kHz stereo WAVs is generated: noisy tone bursts with leading, trailing
+and long internal pauses, in the shape of a typical voice note.
+
+Usage:
+    python benchmarks/bench_audio_preprocess.py [audio ...]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import wave
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pydub import AudioSegment  # noqa: E402
+
+import stt  # noqa: E402
+
+# (leading silence, [(speech, pause), ...], trailing silence) in seconds
+SAMPLES = {
+    "short_note.wav": (1.5, [(4, 0.3), (3, 0)], 2.0),
+    "hesitant.wav": (2.0, [(3, 2.5), (2, 3.0), (4, 1.5), (3, 0)], 3.0),
+    "long_message.wav": (1.0, [(8, 0.5), (7, 1.2), (9, 0.4), (6, 2.0), (8, 0)], 1.5),
+    "mostly_silent.wav": (6.0, [(2, 8.0), (2, 0)], 6.0),
+}
+
+
+def synthetic_recording(path, layout, rate=44100):
+    lead, parts, trail = layout
+    rng = np.random.default_rng(len(path))
+    pieces = [np.zeros(int(lead * rate))]
+    for speech, pause in parts:
+        t = np.arange(int(speech * rate)) / rate
+        # Syllable-like amplitude modulation over a voiced tone
+        envelope = 0.5 + 0.5 * np.abs(np.sin(2 * np.pi * 3 * t))
+        pieces.append(6000 * envelope * np.sin(2 * np.pi * 180 * t))
+        pieces.append(np.zeros(int(pause * rate)))
+    pieces.append(np.zeros(int(trail * rate)))
+    mono = np.concatenate(pieces)
+    mono += rng.normal(0, 40, len(mono))
+    stereo = np.repeat(mono[:, None], 2, axis=1).astype(np.int16)
+    with wave.open(path, "wb") as f:
+        f.setnchannels(2)
+        f.setsampwidth(2)
+        f.setframerate(rate)
+        f.writeframes(stereo.tobytes())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="*", help="audio recordings")
+    args = parser.parse_args()
+
+    files = args.files
+    if not files:
+        directory = tempfile.mkdtemp(prefix="bench_audio_")
+        files = []
+        for name, layout in SAMPLES.items():
+            path = os.path.join(directory, name)
+            synthetic_recording(path, layout)
+            files.append(path)
+
+    print(f"{'file':<20} {'in (s)':>7} {'out (s)':>7} {'in (KB)':>9} {'out (KB)':>9} {'saved':>6} {'time (ms)':>9}")
+    totals = np.zeros(4)
+    for path in files:
+        original = AudioSegment.from_file(path)
+        start = time.perf_counter()
+        audio = stt.preprocess_audio(path)
+        elapsed = time.perf_counter() - start
+        out_bytes = len(audio.frame_data) if audio else 0
+        out_seconds = out_bytes / (audio.sample_rate * audio.sample_width) if audio else 0.0
+        row = np.array([len(original) / 1000, out_seconds, len(original.raw_data), out_bytes])
+        totals += row
+        print(f"{os.path.basename(path)[:20]:<20} {row[0]:>7.1f} {row[1]:>7.1f} {row[2] / 1024:>9.0f} "
+              f"{row[3] / 1024:>9.0f} {1 - row[3] / row[2]:>6.0%} {elapsed * 1000:>9.1f}")
+    print(f"{'total':<20} {totals[0]:>7.1f} {totals[1]:>7.1f} {totals[2] / 1024:>9.0f} "
+          f"{totals[3] / 1024:>9.0f} {1 - totals[3] / totals[2]:>6.0%}")
+    print(f"audio seconds saved: {totals[0] - totals[1]:.1f} ({1 - totals[1] / totals[0]:.0%})")
+
+
+if __name__ == "__main__":
+    main()
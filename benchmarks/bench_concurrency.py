@@ -0,0 +1,156 @@
+"""
+Concurrency benchmark: thread-per-stream chat vs. the async streaming path.
+
+Drives N simultaneous chat streams against a fake completion backend (no
+network, no API key needed) and compares:
+
+  before  a sync generator over a blocking client, consumed on a bounded
+          thread pool the way Gradio runs sync handlers (40 threads by default)
+  after   utils.chat_with_bot_stream, an async generator on one event loop
+
+Usage:
+    python benchmarks/bench_concurrency.py [--streams 400] [--tokens 200]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GROQ_API_KEY", "fake")
+
+import utils  # noqa: E402
+
+
+def _chunk(text):
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+
+
+class FakeSyncCompletions:
+    """Blocking stand-in for client.chat.completions."""
+
+    def __init__(self, ttft, tokens, token_delay):
+        self.ttft, self.tokens, self.token_delay = ttft, tokens, token_delay
+
+    def create(self, **kwargs):
+        time.sleep(self.ttft)
+        for i in range(self.tokens):
+            time.sleep(self.token_delay)
+            yield _chunk(f"tok{i} ")
+
+
+class FakeAsyncStream:
+    def __init__(self, tokens, token_delay):
+        self.tokens, self.token_delay, self.i = tokens, token_delay, 0
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self.i >= self.tokens:
+            raise StopAsyncIteration
+        await asyncio.sleep(self.token_delay)
+        self.i += 1
+        return _chunk(f"tok{self.i} ")
+
+
+class FakeAsyncCompletions:
+    """Non-blocking stand-in for the LLM client's chat.completions."""
+
+    def __init__(self, ttft, tokens, token_delay):
+        self.ttft, self.tokens, self.token_delay = ttft, tokens, token_delay
+
+    async def create(self, **kwargs):
+        await asyncio.sleep(self.ttft)
+        return FakeAsyncStream(self.tokens, self.token_delay)
+
+
+def legacy_chat_stream(completions, message, language, history):
+    """The pre-async handler shape: blocking client, sync generator."""
+    history.append({"role": "user", "content": message})
+    messages = utils.build_chat_messages(history, language)
+    history.append({"role": "assistant", "content": ""})
+    full_response = ""
+    for chunk in completions.create(messages=messages, stream=True):
+        full_response += chunk.choices[0].delta.content or ""
+        history[-1]["content"] = full_response
+        yield history
+
+
+def run_before(args):
+    completions = FakeSyncCompletions(args.ttft, args.tokens, args.token_delay)
+    ttfts, peak_threads = [], [threading.active_count()]
+
+    def one_stream():
+        start = time.perf_counter()
+        first = None
+        for _ in legacy_chat_stream(completions, "What is term life insurance?", "🇬🇧 English", []):
+            if first is None:
+                first = time.perf_counter() - start
+            peak_threads.append(threading.active_count())
+        ttfts.append(first)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        for _ in range(args.streams):
+            pool.submit(one_stream)
+    return time.perf_counter() - start, ttfts, max(peak_threads)
+
+
+def run_after(args):
+    utils.get_llm_client().client = SimpleNamespace(
+        chat=SimpleNamespace(completions=FakeAsyncCompletions(args.ttft, args.tokens, args.token_delay))
+    )
+    ttfts, peak_threads = [], [threading.active_count()]
+
+    async def one_stream():
+        start = time.perf_counter()
+        first = None
+        message = {"text": "What is term life insurance?", "files": []}
+        async for delta in utils.chat_with_bot_stream(message, False, "🇬🇧 English"):
+            # The first update only echoes the user's message
+            if first is None and delta["messages"][-1]["role"] == "assistant":
+                first = time.perf_counter() - start
+            peak_threads.append(threading.active_count())
+        ttfts.append(first)
+
+    async def main():
+        start = time.perf_counter()
+        await asyncio.gather(*(one_stream() for _ in range(args.streams)))
+        return time.perf_counter() - start
+
+    elapsed = asyncio.run(main())
+    return elapsed, ttfts, max(peak_threads)
+
+
+def report(name, args, elapsed, ttfts, peak_threads):
+    ttfts = sorted(ttfts)
+    p95 = ttfts[int(0.95 * (len(ttfts) - 1))]
+    print(
+        f"{name:<7} {args.streams:>7} {elapsed:>9.2f} {args.streams / elapsed:>10.1f} "
+        f"{statistics.median(ttfts):>10.3f} {p95:>9.3f} {peak_threads:>8}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--streams", type=int, default=400, help="concurrent chat streams")
+    parser.add_argument("--tokens", type=int, default=200, help="tokens per completion")
+    parser.add_argument("--ttft", type=float, default=0.3, help="seconds to first token")
+    parser.add_argument("--token-delay", type=float, default=0.01, help="seconds between tokens")
+    parser.add_argument("--threads", type=int, default=40, help="worker threads for the sync baseline")
+    args = parser.parse_args()
+
+    print(f"{'mode':<7} {'streams':>7} {'wall (s)':>9} {'streams/s':>10} {'TTFT p50':>10} {'TTFT p95':>9} {'threads':>8}")
+    report("before", args, *run_before(args))
+    report("after", args, *run_after(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Document cache benchmark: repeated uploads of multi-hundred-page PDFs.
+
+Builds a corpus of generated policy PDFs and times read_file_content for
+
+  cold    first upload, parsed with PyPDF2 and stored in the cache
+  memory  re-upload in the same process (in-memory LRU tier)
+  disk    re-upload after a restart (fresh cache over the same directory)
+
+Usage:
+    python benchmarks/bench_doc_cache.py [--docs 5] [--pages 300]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import utils  # noqa: E402
+from doc_cache import DocumentCache  # noqa: E402
+from pdfgen import write_pdf  # noqa: E402
+
+
+def timed_pass(paths):
+    start = time.perf_counter()
+    for path in paths:
+        utils.read_file_content(path)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=5, help="documents in the corpus")
+    parser.add_argument("--pages", type=int, default=300, help="pages per document")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        cache_dir = os.path.join(workdir, "cache")
+        paths = [
+            write_pdf(os.path.join(workdir, f"policy_{i}.pdf"), args.pages, seed=i)
+            for i in range(args.docs)
+        ]
+        utils.document_cache = DocumentCache(directory=cache_dir)
+        cold = timed_pass(paths)
+        memory = timed_pass(paths)
+        stats = utils.document_cache.stats()
+        utils.document_cache = DocumentCache(directory=cache_dir)
+        disk = timed_pass(paths)
+
+        print(f"{args.docs} documents x {args.pages} pages")
+        print(f"{'pass':<7} {'total (s)':>10} {'per doc (ms)':>13} {'speedup':>8}")
+        for name, elapsed in (("cold", cold), ("memory", memory), ("disk", disk)):
+            print(f"{name:<7} {elapsed:>10.3f} {elapsed / args.docs * 1000:>13.1f} {cold / elapsed:>7.0f}x")
+        print(f"first cache: {stats}")
+        print(f"after restart: {utils.document_cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Conversation persistence: cost on the chat path, write throughput and resume time.
+
+Uses history_db.HistoryDB on a temporary SQLite file (WAL mode):
+
+  save      time a chat handler spends per turn handing two turns to the
+            database: queued for the batching writer (HistoryDB.save), versus
+            committing them on the spot with one transaction per turn
+  writes    turns per second with --sessions conversations saving
+            concurrently, batched versus one commit per turn
+  resume    time to restore a --long-turns conversation: the latest page
+            (HistoryDB.resume) versus reading the whole transcript
+
+Usage:
+    python benchmarks/bench_history_db.py [--sessions 50] [--turns 40] [--long-turns 5000]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from history_db import HistoryDB  # noqa: E402
+from session import ChatSession  # noqa: E402
+
+ANSWER = "A deductible is the amount you pay before your insurer starts paying. " * 12
+
+
+class DirectWriter(HistoryDB):
+    """Commits every save immediately on the caller's thread, one transaction each."""
+
+    def __init__(self, path):
+        super().__init__(path)
+        self._direct = self._connect()
+        self._direct_lock = threading.Lock()
+
+    def save(self, session):
+        captured = []
+        self._queue, queue = _Capture(captured), self._queue
+        try:
+            super().save(session)
+        finally:
+            self._queue = queue
+        with self._direct_lock:
+            self._write(self._direct, captured)
+
+
+class _Capture:
+    """Stands in for the write queue to collect what save() would have queued."""
+
+    def __init__(self, items):
+        self.items = items
+
+    def put(self, item):
+        self.items.append(item)
+
+
+def new_session(name):
+    session = ChatSession()
+    session.conversation = name
+    return session
+
+
+def add_turn(session, turn):
+    session.add({"role": "user", "content": f"Question {turn} about my premium?"})
+    session.add({"role": "assistant", "content": ANSWER})
+
+
+def measure_save(db, args):
+    """Per-turn latency of save() on the caller's thread."""
+    session = new_session(f"save-{type(db).__name__}")
+    times = []
+    for turn in range(args.turns * 5):
+        add_turn(session, turn)
+        start = time.perf_counter()
+        db.save(session)
+        times.append(time.perf_counter() - start)
+    db.flush()
+    return statistics.median(times), statistics.quantiles(times, n=100)[98]
+
+
+def measure_writes(db, args):
+    """Turns per second with args.sessions threads saving concurrently."""
+    def one_session(index):
+        session = new_session(f"load-{type(db).__name__}-{index}")
+        for turn in range(args.turns):
+            add_turn(session, turn)
+            db.save(session)
+
+    threads = [threading.Thread(target=one_session, args=(i,)) for i in range(args.sessions)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    db.flush()
+    elapsed = time.perf_counter() - start
+    return args.sessions * args.turns * 2 / elapsed
+
+
+def measure_resume(db, args):
+    session = new_session("long")
+    for turn in range(args.long_turns // 2):
+        add_turn(session, turn)
+    db.save(session)
+    db.flush()
+
+    start = time.perf_counter()
+    db.resume(ChatSession(), "long")
+    paged = time.perf_counter() - start
+    start = time.perf_counter()
+    full = db.page("long", db.count("long"), limit=args.long_turns)
+    everything = time.perf_counter() - start
+    return paged, everything, len(full)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=50, help="conversations saving concurrently")
+    parser.add_argument("--turns", type=int, default=40, help="turns per conversation")
+    parser.add_argument("--long-turns", type=int, default=5000, help="messages in the resumed conversation")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        batched = HistoryDB(os.path.join(directory, "batched.sqlite3"))
+        direct = DirectWriter(os.path.join(directory, "direct.sqlite3"))
+
+        print(f"{'save':<8} {'p50 (us)':>9} {'p99 (us)':>9}")
+        for name, db in (("direct", direct), ("batched", batched)):
+            p50, p99 = measure_save(db, args)
+            print(f"{name:<8} {p50 * 1e6:>9.1f} {p99 * 1e6:>9.1f}")
+
+        print(f"\n{'writes':<8} {'turns/s':>9}")
+        for name, db in (("direct", direct), ("batched", batched)):
+            print(f"{name:<8} {measure_writes(db, args):>9.0f}")
+
+        paged, everything, count = measure_resume(batched, args)
+        print(f"\nresume a {count}-message conversation: latest page {paged * 1000:.2f} ms, "
+              f"whole transcript {everything * 1000:.1f} ms")
+        batched.close()
+        direct.close()
+
+
+if __name__ == "__main__":
+    main()
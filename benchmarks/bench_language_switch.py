@@ -0,0 +1,102 @@
+"""
+Cost of switching the UI language and currency, on the server versus in the browser.
+
+Builds the app's Blocks and, for the language and currency dropdowns:
+
+  check     every precomputed client-side update equals what the server
+            would have sent (the handler's result through Gradio's
+            postprocess_data)
+  server    time per switch of the old path: the handler plus postprocessing,
+            and a modelled round trip (--rtt-ms) on top; the browser also
+            sent the inputs and received the updates over the queue
+  browser   the js lookup runs locally, with no request at all
+  bytes     how much the precomputed tables add to the page config
+
+Usage:
+    python benchmarks/bench_language_switch.py [--runs 200] [--rtt-ms 150]
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("GROQ_API_KEY", "fake")
+
+import gradio as gr  # noqa: E402
+
+import app  # noqa: E402
+import utils  # noqa: E402
+
+
+def client_table(js):
+    """The {inputs key: updates} table embedded in a client_side_js handler."""
+    start = js.index("({") + 1
+    end = js.rindex("})[") + 1
+    return json.loads(js[start:end])
+
+
+def handlers(demo):
+    """(name, handler, block_fn, input choices) for the two client-side dependencies.
+
+    Found by their trigger, the change event of the dropdown whose choices
+    are the languages or the currencies.
+    """
+    languages, currencies = list(utils.TRANSLATIONS), list(utils.CURRENCY_MAP)
+    switches = {
+        tuple(languages): ("language", utils.update_ui_language, (languages, currencies)),
+        tuple(currencies): ("currency", utils.update_budget_slider, (currencies, languages)),
+    }
+    found = []
+    for block_fn in demo.fns.values():
+        for block_id, event in block_fn.targets:
+            block = demo.blocks.get(block_id)
+            if event != "change" or not isinstance(block, gr.Dropdown):
+                continue
+            switch = switches.get(tuple(value for _, value in block.choices))
+            if switch is not None:
+                name, handler, choices = switch
+                found.append((name, handler, block_fn, choices))
+    return found
+
+
+async def server_updates(demo, handler, block_fn, args):
+    return await demo.postprocess_data(block_fn, handler(*args), None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=200)
+    parser.add_argument("--rtt-ms", type=float, default=150, help="modelled round trip per server call")
+    args = parser.parse_args()
+
+    demo = app.create_ui()
+    loop = asyncio.new_event_loop()
+    print(f"{'switch':<9} {'combos':>6} {'match':>6} {'server (ms)':>12} {'+rtt (ms)':>10} "
+          f"{'browser':>8} {'page bytes':>11}")
+    for name, handler, block_fn, choices in handlers(demo):
+        table = client_table(block_fn.js)
+        combos = list(itertools.product(*choices))
+        matches = 0
+        for combo in combos:
+            key = json.dumps(list(combo), ensure_ascii=False, separators=(",", ":"))
+            expected = loop.run_until_complete(server_updates(demo, handler, block_fn, combo))
+            # Round-trip through JSON so both sides compare as the browser would see them
+            matches += json.loads(json.dumps(expected)) == table[key]
+        start = time.perf_counter()
+        for i in range(args.runs):
+            loop.run_until_complete(server_updates(demo, handler, block_fn, combos[i % len(combos)]))
+        server_ms = (time.perf_counter() - start) / args.runs * 1000
+        page_bytes = len(block_fn.js.encode("utf-8"))
+        print(f"{name:<9} {len(combos):>6} {matches:>6} {server_ms:>12.2f} {server_ms + args.rtt_ms:>10.0f} "
+              f"{'0 calls':>8} {page_bytes:>11}")
+    loop.close()
+
+
+if __name__ == "__main__":
+    main()
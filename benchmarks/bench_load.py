@@ -0,0 +1,206 @@
+"""
+Load test: how many concurrent chats one app process sustains.
+
+Starts benchmarks/fake_groq.py in a child process, points the Groq client at
+it and drives simulated sessions through utils.chat_with_bot_stream and
+utils.generate_policy_recommendation on one event loop, the way Gradio runs
+the async handlers. Each session sends --turns chat messages (and, with
+probability --policy-ratio per turn, a Policy Finder request) with --think
+seconds between them.
+
+Reports throughput, TTFT and total latency percentiles, error counts, and
+the CPU and RSS of this process (the app, not the fake API) as a table and,
+with --json, as a JSON file for tracking regressions.
+
+Usage:
+    python benchmarks/bench_load.py [--sessions 100] [--turns 3] [--json results.json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_groq import free_port, start_server  # noqa: E402
+
+QUESTIONS = [
+    "What does comprehensive car insurance cover?",
+    "Is flood damage included in a standard home policy?",
+    "How do deductibles affect my premium?",
+    "What is the difference between term and whole life insurance?",
+    "Do I need travel insurance for a two week trip to Europe?",
+]
+
+
+def rss_bytes():
+    """Current resident set size (Linux), falling back to the peak."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class Recorder:
+    def __init__(self):
+        self.samples = {"chat": [], "policy": []}
+        self.errors = {"chat": 0, "policy": 0}
+        self.tokens = 0
+
+    def record(self, kind, ttft, total, ok):
+        self.samples[kind].append((ttft, total))
+        if not ok:
+            self.errors[kind] += 1
+
+
+async def chat_turn(utils, recorder, session, language, text):
+    start = time.perf_counter()
+    ttft = None
+    ok = True
+    try:
+        async for delta in utils.chat_with_bot_stream({"text": text, "files": []}, False, language, session=session):
+            last = delta["messages"][-1]
+            if ttft is None and last["role"] == "assistant" and last["content"]:
+                ttft = time.perf_counter() - start
+        reply = session.history[-1].content
+        ok = isinstance(reply, str) and not reply.startswith("Advisor is currently offline")
+        if ok:
+            recorder.tokens += len(reply.split())
+    except Exception:
+        ok = False
+    total = time.perf_counter() - start
+    recorder.record("chat", ttft if ttft is not None else total, total, ok)
+
+
+async def policy_request(utils, recorder, language, details):
+    start = time.perf_counter()
+    ttft = None
+    text = ""
+    async for text in utils.generate_policy_recommendation(
+            details, "Auto", "$50,000", 100, "1 year", 1, "USD", language, use_cache=False):
+        if ttft is None:
+            ttft = time.perf_counter() - start
+    total = time.perf_counter() - start
+    ok = "Error generating recommendation" not in text
+    if ok:
+        recorder.tokens += len(text.split())
+    recorder.record("policy", ttft if ttft is not None else total, total, ok)
+
+
+async def run_session(utils, recorder, args, index):
+    from session import ChatSession
+    rng = random.Random(index)
+    session = ChatSession()
+    # Spread session starts over the ramp-up period
+    await asyncio.sleep(rng.uniform(0, args.ramp))
+    for turn in range(args.turns):
+        await chat_turn(utils, recorder, session, "🇬🇧 English", rng.choice(QUESTIONS))
+        if rng.random() < args.policy_ratio:
+            await policy_request(utils, recorder, "🇬🇧 English", f"Session {index} turn {turn}: full coverage")
+        await asyncio.sleep(args.think)
+
+
+def percentiles(values):
+    if len(values) < 2:
+        value = values[0] if values else 0.0
+        return value, value, value
+    cuts = statistics.quantiles(values, n=100, method="inclusive")
+    return cuts[49], cuts[94], cuts[98]
+
+
+async def monitor(stop, samples):
+    while not stop.is_set():
+        samples.append(rss_bytes())
+        try:
+            await asyncio.wait_for(stop.wait(), 0.25)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def drive(utils, args):
+    recorder = Recorder()
+    stop, rss_samples = asyncio.Event(), []
+    watcher = asyncio.create_task(monitor(stop, rss_samples))
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    await asyncio.gather(*(run_session(utils, recorder, args, i) for i in range(args.sessions)))
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+    stop.set()
+    await watcher
+    return recorder, wall, cpu, rss_samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=100, help="concurrent simulated sessions")
+    parser.add_argument("--turns", type=int, default=3, help="chat messages per session")
+    parser.add_argument("--policy-ratio", type=float, default=0.2, help="chance of a Policy Finder request per turn")
+    parser.add_argument("--think", type=float, default=0.5, help="seconds between a session's requests")
+    parser.add_argument("--ramp", type=float, default=2.0, help="seconds over which sessions start")
+    parser.add_argument("--ttft-median", type=float, default=0.3)
+    parser.add_argument("--ttft-sigma", type=float, default=0.5)
+    parser.add_argument("--token-rate", type=float, default=100.0)
+    parser.add_argument("--tokens", type=int, default=200)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    port = free_port()
+    server = start_server(
+        port, ttft_median=args.ttft_median, ttft_sigma=args.ttft_sigma,
+        token_rate=args.token_rate, tokens=args.tokens, error_rate=args.error_rate, seed=0,
+    )
+    os.environ["GROQ_BASE_URL"] = f"http://127.0.0.1:{port}"
+    os.environ.setdefault("GROQ_API_KEY", "fake")
+    try:
+        import utils
+        rss_idle = rss_bytes()
+        recorder, wall, cpu, rss_samples = asyncio.run(drive(utils, args))
+    finally:
+        server.terminate()
+        server.wait()
+
+    results = {
+        "config": vars(args),
+        "wall_seconds": wall,
+        "cpu_seconds": cpu,
+        "cpu_percent": 100 * cpu / wall,
+        "rss_idle_mb": rss_idle / 2**20,
+        "rss_peak_mb": max(rss_samples + [rss_idle]) / 2**20,
+        "tokens_per_second": recorder.tokens / wall,
+        "requests": {},
+    }
+    for kind, samples in recorder.samples.items():
+        ttfts = [s[0] for s in samples]
+        totals = [s[1] for s in samples]
+        p50, p95, p99 = percentiles(ttfts)
+        results["requests"][kind] = {
+            "count": len(samples),
+            "errors": recorder.errors[kind],
+            "throughput_rps": len(samples) / wall,
+            "ttft_p50": p50, "ttft_p95": p95, "ttft_p99": p99,
+            "total_p50": percentiles(totals)[0], "total_p95": percentiles(totals)[1],
+        }
+
+    print(f"{args.sessions} sessions x {args.turns} turns, {wall:.1f}s wall")
+    print(f"{'kind':<7} {'count':>6} {'errors':>6} {'req/s':>7} {'TTFT p50':>9} {'p95':>7} {'p99':>7} {'total p50':>10} {'p95':>7}")
+    for kind, r in results["requests"].items():
+        print(f"{kind:<7} {r['count']:>6} {r['errors']:>6} {r['throughput_rps']:>7.1f} {r['ttft_p50']:>9.3f} "
+              f"{r['ttft_p95']:>7.3f} {r['ttft_p99']:>7.3f} {r['total_p50']:>10.3f} {r['total_p95']:>7.3f}")
+    print(f"tokens/s {results['tokens_per_second']:.0f}, CPU {results['cpu_percent']:.0f}% "
+          f"({cpu:.1f}s), RSS {results['rss_idle_mb']:.0f} MB idle / {results['rss_peak_mb']:.0f} MB peak")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+PDF extraction throughput: serial in-thread parsing vs. the sharded process pool.
+
+  serial  the previous read_file_content loop, one page after another
+  pool    pdf_extract.extract_pdf, page ranges sharded across worker processes
+
+Usage:
+    python benchmarks/bench_pdf_extract.py [--pages 300] [--workers 4] [--shard 25]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import PyPDF2  # noqa: E402
+
+import pdf_extract  # noqa: E402
+from pdfgen import write_pdf  # noqa: E402
+
+
+def serial_extract(file_path):
+    with open(file_path, "rb") as f:
+        reader = PyPDF2.PdfReader(f)
+        result = f"Total Pages: {len(reader.pages)}\n\nContent:\n"
+        for i, page in enumerate(reader.pages):
+            extracted = page.extract_text()
+            if extracted:
+                result += f"\n--- Page {i+1} ---\n{extracted}\n"
+        return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=300)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--shard", type=int, default=pdf_extract.PDF_SHARD_PAGES)
+    args = parser.parse_args()
+
+    pdf_extract.PDF_WORKERS = args.workers
+    with tempfile.TemporaryDirectory() as workdir:
+        path = write_pdf(os.path.join(workdir, "booklet.pdf"), args.pages)
+
+        start = time.perf_counter()
+        serial_text = serial_extract(path)
+        serial = time.perf_counter() - start
+
+        # Warm the pool so worker start-up is not billed to the first document
+        pdf_extract.extract_pdf(path, max_pages=1)
+        start = time.perf_counter()
+        pool_text, complete = pdf_extract.extract_pdf(path, timeout=600, max_pages=args.pages, shard_pages=args.shard)
+        pooled = time.perf_counter() - start
+
+    assert complete and pool_text == serial_text, "sharded output differs from serial output"
+    print(f"{args.pages} pages, {args.workers} workers, {args.shard} pages per shard")
+    print(f"{'mode':<7} {'seconds':>8} {'pages/s':>9}")
+    print(f"{'serial':<7} {serial:>8.2f} {args.pages / serial:>9.1f}")
+    print(f"{'pool':<7} {pooled:>8.2f} {args.pages / pooled:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
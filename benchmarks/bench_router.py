@@ -0,0 +1,97 @@
+"""
+Latency of model routing on a mixed chat workload.
+
+Simulates chat turns against two model profiles (a large model and a fast
+one, each a TTFT plus a token rate) and compares sending everything to the
+large model with router.ModelRouter. The workload mixes small talk,
+off-topic questions, insurance questions and turns with an attachment.
+Halfway through, the large model slows down (--degraded-ttft) to show
+standard requests moving to the fast model and coming back as it recovers.
+
+Also reports the cost of classifying one message.
+
+Usage:
+    python benchmarks/bench_router.py [--turns 2000] [--degraded-ttft 8]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import router  # noqa: E402
+
+WORKLOAD = [
+    ("Hi there!", 0, 300),
+    ("Thanks, that helps a lot", 0, 300),
+    ("Bonjour", 0, 300),
+    ("Who won the football game yesterday?", 0, 300),
+    ("What does comprehensive car insurance cover?", 0, 500),
+    ("How do deductibles affect my premium?", 0, 500),
+    ("Quelle est la différence entre une assurance vie temporaire et permanente ?", 0, 500),
+    ("Can you review the policy I uploaded and list the exclusions?", 1, 700),
+]
+
+
+def completion_seconds(profile, tokens, rng):
+    ttft, rate = profile
+    ttft *= rng.lognormvariate(0, 0.3)
+    return ttft, ttft + tokens / rate
+
+
+def run(args, routed):
+    rng = random.Random(args.seed)
+    model_router = router.ModelRouter(enabled=routed)
+    profiles = {
+        router.ROUTER_CHAT_MODEL: (args.large_ttft, args.large_rate),
+        router.ROUTER_FAST_MODEL: (args.fast_ttft, args.fast_rate),
+    }
+    phases = {"normal": [], "degraded": [], "recovered": []}
+    models = {}
+    for turn in range(args.turns):
+        phase = "normal" if turn < args.turns // 3 else "degraded" if turn < 2 * args.turns // 3 else "recovered"
+        profiles[router.ROUTER_CHAT_MODEL] = (
+            args.degraded_ttft if phase == "degraded" else args.large_ttft, args.large_rate
+        )
+        text, attachments, tokens = rng.choice(WORKLOAD)
+        route = model_router.route_chat(text, attachments)
+        tokens = min(tokens, route.max_tokens)
+        ttft, total = completion_seconds(profiles[route.model], tokens, rng)
+        model_router.record(route.model, ttft, tokens / (total - ttft))
+        phases[phase].append(total)
+        models[route.model] = models.get(route.model, 0) + 1
+    return phases, models
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=2000)
+    parser.add_argument("--large-ttft", type=float, default=0.6, help="large model seconds to first token")
+    parser.add_argument("--large-rate", type=float, default=120, help="large model tokens per second")
+    parser.add_argument("--fast-ttft", type=float, default=0.15, help="fast model seconds to first token")
+    parser.add_argument("--fast-rate", type=float, default=600, help="fast model tokens per second")
+    parser.add_argument("--degraded-ttft", type=float, default=8.0, help="large model TTFT in the middle third")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    texts = [text for text, _, _ in WORKLOAD] * 500
+    start = time.perf_counter()
+    for text in texts:
+        router.classify_chat(text)
+    print(f"classify_chat: {(time.perf_counter() - start) / len(texts) * 1e6:.1f} us per message\n")
+
+    print(f"{'mode':<7} {'phase':<10} {'mean (s)':>9} {'p95 (s)':>8}")
+    for routed in (False, True):
+        phases, models = run(args, routed)
+        for phase, totals in phases.items():
+            p95 = statistics.quantiles(totals, n=20)[-1]
+            print(f"{'routed' if routed else 'large':<7} {phase:<10} {statistics.mean(totals):>9.2f} {p95:>8.2f}")
+        print("        models: " + ", ".join(f"{model} {count}" for model, count in sorted(models.items())))
+
+
+if __name__ == "__main__":
+    main()
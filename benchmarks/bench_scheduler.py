@@ -0,0 +1,78 @@
+"""
+Fairness of the rate-limit scheduler under a burst from one heavy session.
+
+One session fires --heavy chat requests at once while --light other sessions
+send --light-requests each a moment later, all under a requests-per-minute
+limit. Requests are admitted by scheduler.FairScheduler and then "run" for a
+fixed time. Compared:
+
+  fifo  every request under one key: first come, first served
+  fair  one key per session: round-robin across sessions
+
+A few Policy Finder requests are mixed in to show they yield to chat.
+
+Usage:
+    python benchmarks/bench_scheduler.py [--rpm 600] [--heavy 40] [--light 10]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import scheduler  # noqa: E402
+
+
+async def request(sched, key, priority, waits, label, run_seconds):
+    start = time.monotonic()
+    ticket = sched.enqueue(key, priority, 500)
+    await ticket.wait()
+    waits.setdefault(label, []).append(time.monotonic() - start)
+    await asyncio.sleep(run_seconds)
+    ticket.release(500)
+
+
+async def scenario(args, fair):
+    sched = scheduler.FairScheduler(rpm=args.rpm)
+    # Start with an empty bucket so the burst is actually rate limited
+    sched.requests.level = 0
+    waits = {}
+    key = (lambda session: session) if fair else (lambda session: "all")
+    heavy = [asyncio.ensure_future(request(sched, key("heavy"), scheduler.CHAT, waits, "heavy chat", args.run))
+             for _ in range(args.heavy)]
+    await asyncio.sleep(0.01)
+    others = [asyncio.ensure_future(request(sched, key(f"light{i}"), scheduler.CHAT, waits, "light chat", args.run))
+              for i in range(args.light) for _ in range(args.light_requests)]
+    others += [asyncio.ensure_future(request(sched, key(f"policy{i}"), scheduler.POLICY, waits, "policy", args.run))
+               for i in range(args.policy)]
+    await asyncio.gather(*heavy, *others)
+    return waits
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rpm", type=int, default=600, help="requests per minute allowed upstream")
+    parser.add_argument("--heavy", type=int, default=40, help="requests in the heavy session's burst")
+    parser.add_argument("--light", type=int, default=10, help="other sessions")
+    parser.add_argument("--light-requests", type=int, default=1, help="requests per other session")
+    parser.add_argument("--policy", type=int, default=3, help="Policy Finder requests")
+    parser.add_argument("--run", type=float, default=0.2, help="seconds each admitted request runs")
+    args = parser.parse_args()
+
+    print(f"{args.rpm} RPM, heavy burst of {args.heavy}, {args.light} x {args.light_requests} light, {args.policy} policy")
+    print(f"{'mode':<5} {'class':<11} {'count':>5} {'mean wait (s)':>14} {'max wait (s)':>13}")
+    for fair in (False, True):
+        waits = asyncio.run(scenario(args, fair))
+        for label in ("heavy chat", "light chat", "policy"):
+            values = waits.get(label, [])
+            if values:
+                print(f"{'fair' if fair else 'fifo':<5} {label:<11} {len(values):>5} "
+                      f"{statistics.mean(values):>14.2f} {max(values):>13.2f}")
+
+
+if __name__ == "__main__":
+    main()
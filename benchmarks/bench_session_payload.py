@@ -0,0 +1,110 @@
+"""
+Bytes on the wire per chat turn: full transcript round trip versus server-side history.
+
+Runs a conversation of --turns turns through utils.chat_with_bot_stream
+against a fake streaming LLM client. Every yielded value is postprocessed
+and diffed the way Gradio streams it, and the request payload is the JSON
+of the handler's inputs. Two accountings of the same run:
+
+  before  the Chatbot value is an input and an output: the browser uploads
+          the whole transcript, and the first update of each turn downloads
+          all of it again before the append diffs
+  after   the session store keeps the transcript; only the new message goes
+          up, and updates carry just this turn's messages (transcript_delta)
+
+Reports the bytes up and down for selected turns, and the totals.
+
+Usage:
+    python benchmarks/bench_session_payload.py [--turns 50] [--tokens 250]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GROQ_API_KEY", "fake")
+
+import gradio as gr  # noqa: E402
+from gradio.utils import diff  # noqa: E402
+
+import utils  # noqa: E402
+from session import ChatSession  # noqa: E402
+
+
+class FakeStream:
+    def __init__(self, tokens):
+        self.tokens = tokens
+
+    def __aiter__(self):
+        return self._chunks()
+
+    async def _chunks(self):
+        for i in range(self.tokens):
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=f"word{i} "))])
+
+
+class FakeCompletions:
+    def __init__(self, tokens):
+        self.tokens = tokens
+
+    async def create(self, **kwargs):
+        return FakeStream(self.tokens)
+
+
+def wire_bytes(values):
+    """JSON bytes Gradio sends for a stream of output values: the first in full, then diffs."""
+    total, previous = 0, None
+    for value in values:
+        total += len(json.dumps(value if previous is None else diff(previous, value)))
+        previous = value
+    return total
+
+
+async def run(args):
+    utils.get_llm_client().client = SimpleNamespace(chat=SimpleNamespace(completions=FakeCompletions(args.tokens)))
+    chatbot = gr.Chatbot(type="messages")
+    delta_output = gr.JSON()
+    session = ChatSession()
+    rows = []
+    for turn in range(1, args.turns + 1):
+        message = {"text": f"Question {turn}: how does my deductible change the premium on policy {turn}?",
+                   "files": []}
+        before_value = chatbot.postprocess(session.messages()).model_dump()
+        before_up = len(json.dumps([message, False, "🇬🇧 English", before_value]))
+        # Plus the conversation id kept in browser storage
+        after_up = len(json.dumps([message, False, "🇬🇧 English", "0" * 32]))
+        deltas, transcripts = [], []
+        async for delta in utils.chat_with_bot_stream(message, False, "🇬🇧 English", session=session):
+            deltas.append(delta_output.postprocess(delta).model_dump())
+            transcripts.append(chatbot.postprocess(session.messages()).model_dump())
+        # The old handler did not echo the user's message before the first token
+        before_down = wire_bytes(transcripts[1:])
+        after_down = wire_bytes(deltas)
+        rows.append((turn, before_up, before_down, after_up, after_down))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=50)
+    parser.add_argument("--tokens", type=int, default=250, help="tokens per streamed answer")
+    args = parser.parse_args()
+
+    rows = asyncio.run(run(args))
+    shown = {1, 10, 25, args.turns}
+    print(f"{'turn':>5} {'before up':>10} {'before down':>12} {'after up':>9} {'after down':>11}")
+    for turn, before_up, before_down, after_up, after_down in rows:
+        if turn in shown:
+            print(f"{turn:>5} {before_up:>10} {before_down:>12} {after_up:>9} {after_down:>11}")
+    totals = [sum(column) for column in zip(*rows)][1:]
+    print(f"{'total':>5} {totals[0]:>10} {totals[1]:>12} {totals[2]:>9} {totals[3]:>11}")
+    print(f"\nbytes per turn, mean: before {(totals[0] + totals[1]) / len(rows):.0f}, "
+          f"after {(totals[2] + totals[3]) / len(rows):.0f}")
+
+
+if __name__ == "__main__":
+    main()
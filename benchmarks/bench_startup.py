@@ -0,0 +1,151 @@
+"""
+Cold start: import time per module and time until the app serves its page.
+
+Each run is a fresh interpreter. Two measurements:
+
+  imports   `python -X importtime -c "import app"`, parsed into cumulative
+            and self time per module; the project's own modules and the
+            slowest third-party packages are listed
+  ready     import app, create_ui(), launch() and the first successful GET /,
+            timed separately in a child process
+
+Also lists which heavy optional dependencies were loaded by the import and
+by launch (the LLM client and its groq SDK are built by the lifespan hook;
+speech, TTS and document libraries should only load on first use).
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 3] [--top 10] [--json startup.json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+PROJECT_MODULES = (
+    "app", "utils", "static", "streaming", "context", "doc_cache", "pdf_extract", "retrieval", "session",
+    "rec_cache", "tts", "stt", "attachments", "metrics", "llm_client", "scheduler", "router",
+)
+LAZY_MODULES = ("speech_recognition", "gtts", "groq", "dotenv", "pydub", "PyPDF2", "docx")
+
+
+def child_env():
+    env = dict(os.environ, PYTHONPATH=ROOT, GRADIO_ANALYTICS_ENABLED="False")
+    env.setdefault("GROQ_API_KEY", "fake")
+    # Warm-up connections go nowhere, quickly
+    env.setdefault("GROQ_BASE_URL", "http://127.0.0.1:9")
+    return env
+
+
+def import_times():
+    """{module: (self_us, cumulative_us)} for every top-level package loaded by `import app`."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app"],
+        cwd=ROOT, env=child_env(), capture_output=True, text=True, check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        try:
+            self_us, cumulative_us = int(fields[0]), int(fields[1])
+        except ValueError:
+            continue  # the header line
+        module = fields[2].strip()
+        if "." not in module:
+            times[module] = (self_us, cumulative_us)
+    return times
+
+
+def ready_child():
+    """Runs in the child: time each startup phase and print them as JSON."""
+    start = time.perf_counter()
+    import app
+    imported = time.perf_counter()
+    loaded_by_import = [name for name in LAZY_MODULES if name in sys.modules]
+    demo = app.create_ui()
+    built = time.perf_counter()
+    demo.launch(prevent_thread_lock=True, app_kwargs={"lifespan": app.lifespan}, quiet=True)
+    launched = time.perf_counter()
+    while True:
+        try:
+            with urllib.request.urlopen(demo.local_url, timeout=5) as response:
+                response.read()
+            break
+        except OSError:
+            time.sleep(0.01)
+    served = time.perf_counter()
+    loaded_by_launch = [name for name in LAZY_MODULES if name in sys.modules and name not in loaded_by_import]
+    demo.close()
+    print(json.dumps({
+        "import": imported - start, "create_ui": built - imported, "launch": launched - built,
+        "first_page": served - launched, "ready": served - start,
+        "loaded_by_import": loaded_by_import, "loaded_by_launch": loaded_by_launch,
+    }))
+
+
+def ready_times():
+    result = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child"],
+        cwd=ROOT, env=child_env(), capture_output=True, text=True, check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10, help="third-party packages to list")
+    parser.add_argument("--json", help="also write the results to this file")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        ready_child()
+        return
+
+    runs = [import_times() for _ in range(args.runs)]
+    modules = set().union(*runs)
+    median = {m: (statistics.median(r.get(m, (0, 0))[0] for r in runs) / 1000,
+                  statistics.median(r.get(m, (0, 0))[1] for r in runs) / 1000) for m in modules}
+
+    print(f"Import time, median of {args.runs} runs (ms)")
+    print(f"{'module':<22} {'self':>8} {'cumulative':>11}")
+    for module in PROJECT_MODULES:
+        if module in median:
+            print(f"{module:<22} {median[module][0]:>8.1f} {median[module][1]:>11.1f}")
+    print()
+    third_party = sorted((m for m in median if m not in PROJECT_MODULES and not m.startswith("_")),
+                         key=lambda m: -median[m][1])
+    for module in third_party[:args.top]:
+        print(f"{module:<22} {median[module][0]:>8.1f} {median[module][1]:>11.1f}")
+
+    ready = [ready_times() for _ in range(args.runs)]
+    phases = ("import", "create_ui", "launch", "first_page", "ready")
+    print(f"\nTime to ready, median of {args.runs} runs (s)")
+    for phase in phases:
+        print(f"{phase:<12} {statistics.median(r[phase] for r in ready):>7.3f}")
+    print(f"\nOf {', '.join(LAZY_MODULES)}:")
+    for when in ("import", "launch"):
+        loaded = ready[-1]["loaded_by_" + when]
+        print(f"  loaded by {when}: {', '.join(loaded) or 'none'}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({
+                "imports_ms": {m: {"self": s, "cumulative": c} for m, (s, c) in median.items()},
+                "ready_seconds": {p: statistics.median(r[p] for r in ready) for p in phases},
+                "loaded_by_import": ready[-1]["loaded_by_import"],
+                "loaded_by_launch": ready[-1]["loaded_by_launch"],
+            }, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
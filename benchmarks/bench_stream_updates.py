@@ -0,0 +1,113 @@
+"""
+Chat stream update benchmark: per-token full-history yields vs. coalesced updates.
+
+Replays one streamed answer at the end of a long conversation through Gradio's
+own Chatbot postprocessing and streaming diff, and reports per response:
+
+  updates  number of values yielded to Gradio
+  wire KB  JSON bytes of the diffs Gradio sends to the browser
+  cpu ms   server CPU spent building, postprocessing and diffing the updates
+
+  before  tuples-format history rebuilt and yielded on every token
+  after   messages-format history, StreamBuffer coalescing (50 ms / 64 chars)
+
+Usage:
+    python benchmarks/bench_stream_updates.py [--turns 40] [--tokens 1500]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import gradio as gr  # noqa: E402
+from gradio.utils import diff  # noqa: E402
+
+from streaming import StreamBuffer  # noqa: E402
+
+
+class FakeClock:
+    """Token arrival clock so the time window is exercised deterministically."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def tokens(count):
+    return [f"word{i} " for i in range(count)]
+
+
+def measure(updates, chatbot):
+    """Postprocess and diff each value as it is yielded, the way Gradio streams it."""
+    count, wire_bytes, previous = 0, 0, None
+    start = time.process_time()
+    for value in updates:
+        payload = chatbot.postprocess(value).model_dump()
+        wire_bytes += len(json.dumps(payload if previous is None else diff(previous, payload)))
+        previous = payload
+        count += 1
+    return count, wire_bytes, time.process_time() - start
+
+
+def run_before(args):
+    history = [(f"question {i} " * 20, f"answer {i} " * 60) for i in range(args.turns)]
+    history.append(("final question", ""))
+    chatbot = gr.Chatbot(type="tuples")
+
+    def updates():
+        full_response = ""
+        for token in tokens(args.tokens):
+            full_response += token
+            history[-1] = (history[-1][0], full_response)
+            yield [(u, a) for u, a in history if u != "system"]
+
+    return measure(updates(), chatbot)
+
+
+def run_after(args):
+    history = []
+    for i in range(args.turns):
+        history.append({"role": "user", "content": f"question {i} " * 20})
+        history.append({"role": "assistant", "content": f"answer {i} " * 60})
+    history.append({"role": "user", "content": "final question"})
+    chatbot = gr.Chatbot(type="messages")
+    clock = FakeClock()
+
+    def updates():
+        reply = {"role": "assistant", "content": ""}
+        history.append(reply)
+        buffer = StreamBuffer(flush_ms=args.flush_ms, flush_chars=args.flush_chars, clock=clock)
+        for token in tokens(args.tokens):
+            clock.now += args.token_interval
+            if buffer.append(token):
+                reply["content"] = buffer.flush()
+                yield history
+        reply["content"] = buffer.flush()
+        yield history
+
+    return measure(updates(), chatbot)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=40, help="prior conversation turns")
+    parser.add_argument("--tokens", type=int, default=1500, help="tokens in the streamed answer")
+    parser.add_argument("--token-interval", type=float, default=0.004, help="seconds between tokens")
+    parser.add_argument("--flush-ms", type=float, default=50)
+    parser.add_argument("--flush-chars", type=int, default=64)
+    args = parser.parse_args()
+
+    print(f"{'mode':<7} {'updates':>8} {'wire KB':>10} {'cpu ms':>9}")
+    for name, run in (("before", run_before), ("after", run_after)):
+        count, wire, cpu = run(args)
+        print(f"{name:<7} {count:>8} {wire / 1024:>10.1f} {cpu * 1000:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Real-time factor (processing time / audio duration) of the speech-to-text engines.
+
+Each engine transcribes the same recordings twice:
+
+  whole    the full recording in a single engine call (the old behaviour)
+  chunked  stt.transcribe_audio: silence trimmed, split, chunks transcribed in parallel
+
+Pass WAV files to measure real speech. Without files a synthetic recording of
+tone bursts separated by pauses is generated, which only exercises splitting
+and scheduling. The "simulated" engine (fixed round trip plus a fraction of the
+audio length per call) needs neither network nor models.
+
+Usage:
+    python benchmarks/bench_stt.py [--engines simulated,google,sphinx,whisper] [audio.wav ...]
+"""
+
+import argparse
+import math
+import os
+import struct
+import sys
+import tempfile
+import time
+import wave
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import speech_recognition as sr  # noqa: E402
+
+import stt  # noqa: E402
+
+
+class SimulatedEngine(stt.TranscriptionEngine):
+    name = "simulated"
+
+    def __init__(self, latency, rtf):
+        self.latency, self.rtf = latency, rtf
+
+    def transcribe(self, audio, language):
+        seconds = len(audio.frame_data) / (audio.sample_rate * audio.sample_width)
+        time.sleep(self.latency + self.rtf * seconds)
+        return f"[{seconds:.1f}s]"
+
+
+def synthetic_recording(path, seconds=180, rate=16000):
+    """Write a mono WAV of 8 s tone bursts separated by 1 s pauses."""
+    frames = bytearray()
+    for i in range(int(seconds * rate)):
+        t = i / rate
+        level = 8000 if t % 9 < 8 else 0
+        frames += struct.pack("<h", int(level * math.sin(2 * math.pi * 220 * t)))
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(rate)
+        f.writeframes(bytes(frames))
+
+
+def load_audio(path):
+    with sr.AudioFile(path) as source:
+        return sr.Recognizer().record(source)
+
+
+def run(engine, path, chunked):
+    audio = load_audio(path)
+    duration = len(audio.frame_data) / (audio.sample_rate * audio.sample_width)
+    start = time.perf_counter()
+    if chunked:
+        text = stt.transcribe_audio(path, engine=engine.name)
+    else:
+        try:
+            text = engine.transcribe(audio, "en-US")
+        except (sr.UnknownValueError, sr.RequestError) as e:
+            text = f"<{type(e).__name__}>"
+    elapsed = time.perf_counter() - start
+    chunks = len(stt.split_on_silence(stt.preprocess_audio(path))) if chunked else 1
+    return duration, elapsed, chunks, text
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="*", help="WAV/AIFF/FLAC recordings")
+    parser.add_argument("--engines", default="simulated", help="comma-separated engine names")
+    parser.add_argument("--latency", type=float, default=0.5, help="simulated round trip per call")
+    parser.add_argument("--rtf", type=float, default=0.3, help="simulated seconds per second of audio")
+    args = parser.parse_args()
+
+    stt.ENGINES["simulated"] = lambda: SimulatedEngine(args.latency, args.rtf)
+    files = args.files
+    if not files:
+        path = os.path.join(tempfile.gettempdir(), "bench_stt.wav")
+        synthetic_recording(path)
+        files = [path]
+
+    print(f"{'engine':<10} {'mode':<8} {'file':<20} {'audio (s)':>9} {'chunks':>6} {'wall (s)':>9} {'RTF':>6}")
+    for name in args.engines.split(","):
+        engine = stt.get_engine(name)
+        for path in files:
+            for chunked in (False, True):
+                duration, elapsed, chunks, text = run(engine, path, chunked)
+                mode = "chunked" if chunked else "whole"
+                print(f"{name:<10} {mode:<8} {os.path.basename(path)[:20]:<20} {duration:>9.1f} "
+                      f"{chunks:>6} {elapsed:>9.2f} {elapsed / duration:>6.3f}")
+
+
+if __name__ == "__main__":
+    main()
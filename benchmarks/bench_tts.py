@@ -0,0 +1,137 @@
+"""
+Time-to-first-audio: synthesize-after-completion vs. the sentence pipeline.
+
+Streams a canned answer at a fixed token rate and synthesizes it with either
+a simulated engine (fixed round trip plus time per character, the default) or
+real gTTS (--real, needs network):
+
+  before  wait for the full answer, then one synthesis call for all of it
+  after   tts.SpeechPipeline, sentences synthesized while tokens stream
+
+Then checks playback: a chat turn with audio on, through
+utils.chat_with_bot_stream and a fake model, must send every audio message
+in its transcript deltas with a url the running app serves.
+
+Usage:
+    python benchmarks/bench_tts.py [--token-delay 0.01] [--real]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+import uuid
+from types import SimpleNamespace
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GROQ_API_KEY", "fake")
+
+import tts  # noqa: E402
+import utils  # noqa: E402
+from app import create_ui  # noqa: E402
+from bench_answer_cache import FakeCompletions  # noqa: E402
+from session import ChatSession  # noqa: E402
+
+ANSWER = (
+    "Term life insurance covers you for a fixed period, such as ten, twenty or thirty years. "
+    "If you pass away during the term, your beneficiaries receive the death benefit. "
+    "Premiums are usually much lower than for whole life insurance because there is no cash value. "
+    "Many policies can be renewed or converted to permanent coverage without a new medical exam. "
+    "It is a good fit when you need to protect a mortgage or replace income while children are young. "
+    "Compare quotes from several insurers and check the financial strength ratings before you buy. "
+) * 3
+
+
+def simulated_synthesis(args):
+    def synthesize(text, language):
+        time.sleep(args.tts_latency + args.tts_per_char * len(text))
+        return f"clip_{len(text)}.mp3"
+    return synthesize
+
+
+async def stream_tokens(args):
+    for word in ANSWER.split(" "):
+        await asyncio.sleep(args.token_delay)
+        yield word + " "
+
+
+async def run_before(args, synthesize):
+    start = time.perf_counter()
+    text = "".join([t async for t in stream_tokens(args)])
+    await asyncio.to_thread(synthesize, text, "🇬🇧 English")
+    return time.perf_counter() - start
+
+
+async def run_after(args, synthesize):
+    pipeline = tts.SpeechPipeline("🇬🇧 English", synthesize=synthesize)
+    async for token in stream_tokens(args):
+        pipeline.feed(token)
+        pipeline.ready()
+    pipeline.finish()
+    async for _ in pipeline.remaining():
+        pass
+    return pipeline.first_audio
+
+
+def write_clip(text, language):
+    os.makedirs(tts.TTS_CACHE_DIR, exist_ok=True)
+    path = os.path.join(tts.TTS_CACHE_DIR, f"bench-{uuid.uuid4().hex}.mp3")
+    with open(path, "wb") as f:
+        f.write(b"ID3" + text.encode("utf-8"))
+    return path
+
+
+async def audio_urls():
+    """Urls of the audio messages in one spoken chat turn's transcript deltas."""
+    utils.get_llm_client().client = SimpleNamespace(chat=SimpleNamespace(completions=FakeCompletions(40, 0)))
+    utils.SpeechPipeline = lambda language: tts.SpeechPipeline(language, synthesize=write_clip)
+    urls = {}
+    async for delta in utils.chat_with_bot_stream({"text": "What is term life insurance?", "files": []}, True,
+                                                  "🇬🇧 English", session=ChatSession()):
+        for message in delta["messages"]:
+            if isinstance(message["content"], dict):
+                urls[message["content"]["file"]["path"]] = message["content"]["file"]["url"]
+    return urls
+
+
+def check_playback():
+    urls = asyncio.run(audio_urls())
+    demo = create_ui()
+    demo.launch(allowed_paths=[tts.TTS_CACHE_DIR], prevent_thread_lock=True, quiet=True)
+    failures = 0
+    try:
+        print(f"\n{'audio message':<44} {'status':>6}")
+        for path, url in urls.items():
+            status = httpx.get(demo.local_url.rstrip("/") + url).status_code if url else None
+            failures += status != 200
+            print(f"{os.path.basename(path):<44} {status or 'no url':>6}")
+            os.remove(path)
+    finally:
+        demo.close()
+    if not urls or failures:
+        sys.exit(f"playback check failed: {failures} of {len(urls)} audio messages cannot be fetched")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--token-delay", type=float, default=0.01, help="seconds between streamed words")
+    parser.add_argument("--tts-latency", type=float, default=0.4, help="simulated round trip per call")
+    parser.add_argument("--tts-per-char", type=float, default=0.004, help="simulated seconds per character")
+    parser.add_argument("--real", action="store_true", help="use gTTS instead of the simulated engine")
+    args = parser.parse_args()
+
+    synthesize = tts.synthesize_speech if args.real else simulated_synthesis(args)
+    before = asyncio.run(run_before(args, synthesize))
+    after = asyncio.run(run_after(args, synthesize))
+    print(f"{len(ANSWER)} characters, {len(ANSWER.split())} words streamed")
+    print(f"{'mode':<7} {'first audio (s)':>16}")
+    print(f"{'before':<7} {before:>16.2f}")
+    print(f"{'after':<7} {after:>16.2f}")
+    check_playback()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Local stand-in for the Groq chat completions endpoint, for load testing.
+
+Serves POST /openai/v1/chat/completions as an OpenAI-style SSE stream with a
+log-normal time to first token, a fixed token rate and optional error
+injection. Point the Groq client at it with GROQ_BASE_URL.
+
+Usage:
+    python benchmarks/fake_groq.py [--port 8765] [--ttft-median 0.3] [--ttft-sigma 0.5]
+                                   [--token-rate 100] [--tokens 200] [--error-rate 0.0]
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import socket
+import subprocess
+import sys
+import time
+import uuid
+
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+WORDS = (
+    "coverage premium deductible policy claim liability insurer beneficiary "
+    "term renewal exclusion rider comprehensive collision"
+).split()
+
+
+def _chunk(completion_id, model, content=None, finish_reason=None):
+    delta = {"content": content} if content is not None else {}
+    return "data: " + json.dumps({
+        "id": completion_id,
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+    }) + "\n\n"
+
+
+def create_app(ttft_median=0.3, ttft_sigma=0.5, token_rate=100.0, tokens=200, error_rate=0.0, seed=None):
+    rng = random.Random(seed)
+
+    async def completions(request):
+        body = await request.json()
+        model = body.get("model", "fake")
+        if rng.random() < error_rate:
+            # Alternate between rate limiting and server errors, as the real API does
+            if rng.random() < 0.5:
+                return JSONResponse({"error": {"message": "Rate limit reached", "type": "tokens"}},
+                                    status_code=429, headers={"retry-after": "1"})
+            return JSONResponse({"error": {"message": "Internal server error"}}, status_code=500)
+        ttft = rng.lognormvariate(0, ttft_sigma) * ttft_median
+        limit = body.get("max_completion_tokens") or body.get("max_tokens") or tokens
+        count = min(tokens, limit)
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+
+        async def stream():
+            await asyncio.sleep(ttft)
+            started = time.perf_counter()
+            for i in range(count):
+                # Pace against the start time so the rate holds under load
+                delay = started + i / token_rate - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                ending = ". " if i % 12 == 11 else " "
+                yield _chunk(completion_id, model, rng.choice(WORDS) + ending)
+            yield _chunk(completion_id, model, finish_reason="stop")
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(stream(), media_type="text/event-stream")
+
+    return Starlette(routes=[Route("/openai/v1/chat/completions", completions, methods=["POST"])])
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(port, **options):
+    """Run the fake API in a child process, so its CPU is not counted as the app's.
+
+    Returns the process once the port accepts connections.
+    """
+    args = [sys.executable, __file__, "--port", str(port)]
+    for name, value in options.items():
+        args += ["--" + name.replace("_", "-"), str(value)]
+    process = subprocess.Popen(args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 15
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return process
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError("fake Groq server did not start")
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--ttft-median", type=float, default=0.3, help="median seconds to first token")
+    parser.add_argument("--ttft-sigma", type=float, default=0.5, help="log-normal spread of the TTFT")
+    parser.add_argument("--token-rate", type=float, default=100.0, help="tokens per second per stream")
+    parser.add_argument("--tokens", type=int, default=200, help="tokens per completion")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests failing with 429/500")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    app = create_app(args.ttft_median, args.ttft_sigma, args.token_rate, args.tokens, args.error_rate, args.seed)
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning", backlog=4096)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Minimal PDF writer used to build benchmark corpora without extra dependencies.
+
+Produces valid single-font text PDFs that PyPDF2 parses page by page.
+"""
+
+import random
+
+WORDS = (
+    "policy premium coverage deductible insured beneficiary claim liability "
+    "endorsement exclusion rider term renewal underwriting peril indemnity "
+    "collision comprehensive dwelling contents medical travel annuity"
+).split()
+
+
+def _page_text(rng, lines):
+    return [" ".join(rng.choice(WORDS) for _ in range(12)) for _ in range(lines)]
+
+
+def write_pdf(path, pages, lines_per_page=45, seed=0):
+    """Write a text PDF with the given number of pages to path."""
+    rng = random.Random(seed)
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # page tree, filled in once page object numbers are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    page_ids = []
+    for _ in range(pages):
+        commands = ["BT", "/F1 10 Tf", "12 TL", "50 780 Td"]
+        for line in _page_text(rng, lines_per_page):
+            commands.append(f"({line}) Tj T*")
+        commands.append("ET")
+        stream = "\n".join(commands).encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id
+        )
+        page_ids.append(len(objects))
+    kids = " ".join(f"{i} 0 R" for i in page_ids).encode()
+    objects[1] = b"<< /Type /Pages /Kids [" + kids + b"] /Count %d >>" % pages
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    with open(path, "wb") as f:
+        f.write(out)
+    return path
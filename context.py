@@ -0,0 +1,128 @@
+import os
+import re
+
+# -----------------------------------------------------------------------------
+# Prompt Budget Configuration
+# -----------------------------------------------------------------------------
+
+# Total tokens the assembled prompt may use (system prompt, summary and turns)
+CONTEXT_BUDGET_TOKENS = int(os.getenv("CONTEXT_BUDGET_TOKENS", "6000"))
+# Any single message longer than this (typically a pasted document) is elided
+CONTEXT_MESSAGE_MAX_TOKENS = int(os.getenv("CONTEXT_MESSAGE_MAX_TOKENS", "2000"))
+# Rolling summary of evicted turns is kept under this many tokens
+CONTEXT_SUMMARY_MAX_TOKENS = int(os.getenv("CONTEXT_SUMMARY_MAX_TOKENS", "400"))
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+
+# -----------------------------------------------------------------------------
+# Token Counting
+# -----------------------------------------------------------------------------
+
+def count_tokens(text):
+    """Estimate the number of model tokens in text without a network call.
+
+    Words and punctuation are counted as pieces, and long words are charged
+    one token per four characters, which tracks the Llama 3 tokenizer closely
+    enough for budgeting.
+    """
+    return sum((len(piece) + 3) // 4 for piece in _TOKEN_RE.findall(text))
+
+def truncate_to_tokens(text, max_tokens):
+    """Keep the head and tail of text within max_tokens, eliding the middle."""
+    total = count_tokens(text)
+    if total <= max_tokens:
+        return text
+    # Characters per token for this text, used to cut at roughly the right place
+    ratio = len(text) / max(total, 1)
+    keep = max(int(max_tokens * ratio) - 40, 0)
+    head = text[:keep * 2 // 3]
+    tail = text[len(text) - keep // 3:]
+    return f"{head}\n\n[... {total - max_tokens} tokens elided ...]\n\n{tail}"
+
+# -----------------------------------------------------------------------------
+# Context Assembly
+# -----------------------------------------------------------------------------
+
+class ContextState:
+    """Per-conversation rolling summary of messages evicted from the prompt."""
+
+    def __init__(self):
+        self.summary = []
+        self.summarized = 0
+        self.prompt_tokens = 0
+
+    def reset(self):
+        self.summary.clear()
+        self.summarized = 0
+
+def _digest(message):
+    """One-line digest of a message for the rolling summary."""
+    first_sentence = _SENTENCE_RE.split(message["content"].strip(), 1)[0]
+    words = first_sentence.split()
+    line = " ".join(words[:30]) + (" ..." if len(words) > 30 else "")
+    return f"{message['role'].capitalize()}: {line}"
+
+class ContextAssembler:
+    """Fill a prompt token budget with the most recent turns of a conversation.
+
+    Turns are taken newest first until the budget is spent. Oversized messages
+    are elided down to CONTEXT_MESSAGE_MAX_TOKENS, and turns that fall out of
+    the window are folded into a short rolling summary kept on ContextState.
+    """
+
+    def __init__(self, budget=None, message_max_tokens=None, summary_max_tokens=None):
+        self.budget = CONTEXT_BUDGET_TOKENS if budget is None else budget
+        self.message_max_tokens = CONTEXT_MESSAGE_MAX_TOKENS if message_max_tokens is None else message_max_tokens
+        self.summary_max_tokens = CONTEXT_SUMMARY_MAX_TOKENS if summary_max_tokens is None else summary_max_tokens
+
+    def assemble(self, system_prompt, history, state):
+        """Return the chat messages for the model and their estimated token count."""
+        # Audio replies are file references, not text the model can use
+        candidates = [
+            (i, m) for i, m in enumerate(history)
+            if m["content"] and isinstance(m["content"], str)
+        ]
+        if state.summarized > len(history):
+            state.reset()
+
+        used = count_tokens(system_prompt) + self.summary_max_tokens
+        window = []
+        first_kept = len(history)
+        for index, message in reversed(candidates):
+            if index < state.summarized:
+                break
+            content = truncate_to_tokens(message["content"], self.message_max_tokens)
+            tokens = count_tokens(content)
+            if used + tokens > self.budget:
+                if window:
+                    break
+                # Always send the newest message, cut down to what is left
+                content = truncate_to_tokens(content, max(self.budget - used, 0))
+                tokens = count_tokens(content)
+            window.append({"role": message["role"], "content": content})
+            used += tokens
+            first_kept = index
+        window.reverse()
+
+        self._summarize(history, first_kept, state)
+        messages = [{"role": "system", "content": system_prompt}]
+        if state.summary:
+            messages.append({
+                "role": "system",
+                "content": "Summary of the earlier conversation:\n" + "\n".join(state.summary)
+            })
+        messages.extend(window)
+
+        state.prompt_tokens = sum(count_tokens(m["content"]) for m in messages)
+        return messages, state.prompt_tokens
+
+    def _summarize(self, history, first_kept, state):
+        """Fold newly evicted messages into the rolling summary."""
+        for message in history[state.summarized:first_kept]:
+            if message["content"] and isinstance(message["content"], str):
+                state.summary.append(_digest(message))
+        state.summarized = max(state.summarized, first_kept)
+        # Drop the oldest lines once the summary outgrows its budget
+        while state.summary and count_tokens("\n".join(state.summary)) > self.summary_max_tokens:
+            state.summary.pop(0)
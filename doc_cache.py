@@ -0,0 +1,169 @@
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# -----------------------------------------------------------------------------
+# Cache Configuration
+# -----------------------------------------------------------------------------
+
+DOC_CACHE_DIR = os.getenv("DOC_CACHE_DIR", os.path.join(tempfile.gettempdir(), "insurebot-doc-cache"))
+DOC_CACHE_MEMORY_ITEMS = int(os.getenv("DOC_CACHE_MEMORY_ITEMS", "64"))
+DOC_CACHE_DISK_MB = int(os.getenv("DOC_CACHE_DISK_MB", "512"))
+
+# -----------------------------------------------------------------------------
+# Extracted Document Cache
+# -----------------------------------------------------------------------------
+
+def file_digest(file_path):
+    """SHA-256 of a file's contents, read in 1 MiB blocks."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+class DocumentCache:
+    """Two-tier cache of extracted document text keyed by content hash.
+
+    The memory tier is a small LRU of recent documents; the disk tier keeps
+    extracted text across restarts and evicts least recently used files once
+    it grows past its size limit. Including the extractor version in the key
+    means a parser change never serves stale text.
+    """
+
+    def __init__(self, directory=DOC_CACHE_DIR, memory_items=DOC_CACHE_MEMORY_ITEMS, disk_bytes=DOC_CACHE_DISK_MB << 20):
+        self.directory = directory
+        self.memory_items = memory_items
+        self.disk_bytes = disk_bytes
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_usage = None
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def key(self, file_path, extractor_version, page_limit=None):
+        """Cache key for a file: content hash, file type, extractor version and any page limit."""
+        ext = os.path.splitext(file_path)[1].lower().lstrip(".")
+        key = f"{file_digest(file_path)}-{ext}-v{extractor_version}"
+        # Text cut off at the limit must not be served once the limit changes
+        return key if page_limit is None else f"{key}-p{page_limit}"
+
+    def get(self, key):
+        """Return cached text for key, or None on a miss."""
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return self._memory[key]
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                text = f.read()
+            # Refresh the modification time so disk eviction is least-recently-used
+            os.utime(path)
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.disk_hits += 1
+            self._remember(key, text)
+        return text
+
+    def put(self, key, text):
+        """Store extracted text in both tiers."""
+        with self._lock:
+            self._remember(key, text)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            # Write to a temporary file first so readers never see a partial entry
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    f.write(text)
+                os.replace(tmp_path, self._path(key))
+            except BaseException:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+                raise
+        except OSError as e:
+            logger.warning("Could not write document cache entry %s: %s", key, e)
+            return
+        with self._lock:
+            if self._disk_usage is not None:
+                self._disk_usage += len(text.encode("utf-8"))
+        self._evict_disk()
+
+    def stats(self):
+        """Hit/miss counters for both tiers."""
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+                "memory_items": len(self._memory),
+            }
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ".txt")
+
+    def _remember(self, key, text):
+        self._memory[key] = text
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def _evict_disk(self):
+        """Remove least recently used entries until the disk tier fits its limit."""
+        with self._lock:
+            if self._disk_usage is not None and self._disk_usage <= self.disk_bytes:
+                return
+        try:
+            entries = []
+            for entry in os.scandir(self.directory):
+                if entry.name.endswith(".txt"):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        except OSError:
+            return
+        usage = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if usage <= self.disk_bytes:
+                break
+            try:
+                os.remove(path)
+                usage -= size
+            except OSError:
+                pass
+        with self._lock:
+            self._disk_usage = usage
+
+# -----------------------------------------------------------------------------
+# Cache Metrics
+# -----------------------------------------------------------------------------
+
+def register_metrics(cache):
+    metrics.gauge(
+        "insurebot_doc_cache_lookups", "Extracted document lookups, by the tier that answered.", ("result",),
+        callback=lambda: {"memory_hit": cache.memory_hits, "disk_hit": cache.disk_hits, "miss": cache.misses},
+    )
+    metrics.gauge(
+        "insurebot_doc_cache_hit_ratio", "Share of document extractions served from the cache.",
+        callback=lambda: {(): cache.stats()["hit_rate"]},
+    )
+    metrics.gauge(
+        "insurebot_doc_cache_memory_items", "Extracted documents held in the memory tier.",
+        callback=lambda: {(): cache.stats()["memory_items"]},
+    )
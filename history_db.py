@@ -0,0 +1,207 @@
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+import metrics
+from session import Turn
+
+logger = logging.getLogger(__name__)
+
+# -----------------------------------------------------------------------------
+# Persistence Configuration
+# -----------------------------------------------------------------------------
+
+# "sqlite" keeps conversations across reloads and restarts; "off" keeps them in memory only
+HISTORY_BACKEND = os.getenv("HISTORY_BACKEND", "off")
+HISTORY_DB_PATH = os.getenv("HISTORY_DB_PATH", "conversations.sqlite3")
+# Queued writes are committed together once this long has passed or the batch is full
+HISTORY_FLUSH_MS = float(os.getenv("HISTORY_FLUSH_MS", "250"))
+HISTORY_BATCH_MAX = int(os.getenv("HISTORY_BATCH_MAX", "256"))
+# Turns loaded when a conversation is resumed, and per "earlier messages" request
+HISTORY_PAGE_TURNS = int(os.getenv("HISTORY_PAGE_TURNS", "20"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS turns (
+    conversation TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    role TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    content TEXT NOT NULL,
+    document INTEGER,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (conversation, seq)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS documents (
+    conversation TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    metadata TEXT NOT NULL,
+    chunks TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (conversation, position)
+) WITHOUT ROWID;
+"""
+
+# -----------------------------------------------------------------------------
+# Conversation Database
+# -----------------------------------------------------------------------------
+
+def _row_turn(row):
+    role, kind, content, document = row
+    return Turn(role, (content,) if kind == "audio" else content, document)
+
+class HistoryDB:
+    """Conversation turns and documents in SQLite, in WAL mode.
+
+    save() only queues rows; a background thread commits them in batches of
+    up to batch_max, at most flush_ms after the first one was queued. Reads
+    use their own connection, which WAL lets run alongside the writer, so
+    neither side waits on the other. Rows still queued are not visible to
+    reads yet.
+    """
+
+    def __init__(self, path=HISTORY_DB_PATH, flush_ms=HISTORY_FLUSH_MS, batch_max=HISTORY_BATCH_MAX):
+        self.path = path
+        self.flush_ms = flush_ms
+        self.batch_max = batch_max
+        self._queue = queue.SimpleQueue()
+        self._read_lock = threading.Lock()
+        self._reader = self._connect()
+        self._writer = threading.Thread(target=self._write_loop, name="history-writer", daemon=True)
+        self._writer.start()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        # In WAL mode a crash of the app loses nothing; only power loss can drop the last commits
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA)
+        return conn
+
+    def save(self, session):
+        """Queue the session's turns and documents added since the last save."""
+        if session.conversation is None:
+            return
+        now = time.time()
+        documents = []
+        for position in range(session.saved_documents, len(session.documents)):
+            name, metadata, chunks = session.documents.export(position)
+            documents.append((session.conversation, position, name, metadata, json.dumps(chunks), now))
+        turns = []
+        for index in range(session.saved, len(session.history)):
+            turn = session.history[index]
+            kind, content = ("audio", turn.content[0]) if isinstance(turn.content, tuple) else ("text", turn.content)
+            turns.append((session.conversation, session.offset + index, turn.role, kind, content, turn.document, now))
+        session.saved_documents = len(session.documents)
+        session.saved = len(session.history)
+        if documents or turns:
+            self._queue.put((documents, turns))
+
+    def pending(self):
+        return self._queue.qsize()
+
+    def flush(self, timeout=None):
+        """Wait until everything queued so far is committed."""
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def _write_loop(self):
+        conn = self._connect()
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_ms / 1000
+            while len(batch) < self.batch_max and not isinstance(batch[-1], threading.Event):
+                try:
+                    batch.append(self._queue.get(timeout=max(deadline - time.monotonic(), 0)))
+                except queue.Empty:
+                    break
+            try:
+                self._write(conn, [item for item in batch if not isinstance(item, threading.Event)])
+            except Exception:
+                logger.exception("Writing %d conversation updates failed", len(batch))
+                metrics.error("history_write")
+            for item in batch:
+                if isinstance(item, threading.Event):
+                    item.set()
+
+    def _write(self, conn, batch):
+        if not batch:
+            return
+        start = time.perf_counter()
+        conn.execute("BEGIN")
+        try:
+            for documents, turns in batch:
+                conn.executemany("INSERT OR REPLACE INTO documents VALUES (?, ?, ?, ?, ?, ?)", documents)
+                conn.executemany("INSERT OR REPLACE INTO turns VALUES (?, ?, ?, ?, ?, ?, ?)", turns)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        ROWS_WRITTEN.inc(sum(len(documents) + len(turns) for documents, turns in batch))
+        metrics.observe("history_write", time.perf_counter() - start)
+
+    def count(self, conversation):
+        """Number of turns stored for a conversation."""
+        with self._read_lock:
+            row = self._reader.execute(
+                "SELECT MAX(seq) FROM turns WHERE conversation = ?", (conversation,)
+            ).fetchone()
+        return 0 if row[0] is None else row[0] + 1
+
+    def page(self, conversation, end, limit=HISTORY_PAGE_TURNS):
+        """Up to limit Turns before seq end, oldest first."""
+        with self._read_lock:
+            rows = self._reader.execute(
+                "SELECT role, kind, content, document FROM turns "
+                "WHERE conversation = ? AND seq >= ? AND seq < ? ORDER BY seq",
+                (conversation, max(end - limit, 0), end),
+            ).fetchall()
+        return [_row_turn(row) for row in rows]
+
+    def resume(self, session, conversation, limit=HISTORY_PAGE_TURNS):
+        """Bind an empty session to conversation and load its documents and latest turns."""
+        with self._read_lock:
+            documents = self._reader.execute(
+                "SELECT name, metadata, chunks FROM documents WHERE conversation = ? ORDER BY position",
+                (conversation,),
+            ).fetchall()
+        for name, metadata, chunks in documents:
+            session.documents.add_chunks(name, metadata, [tuple(chunk) for chunk in json.loads(chunks)])
+        total = self.count(conversation)
+        session.history = self.page(conversation, total, limit)
+        session.offset = session.shown_from = total - len(session.history)
+        session.saved = len(session.history)
+        session.saved_documents = len(session.documents)
+        session.conversation = conversation
+
+    def close(self):
+        self.flush()
+        with self._read_lock:
+            self._reader.close()
+
+def create_history_db(backend=HISTORY_BACKEND):
+    """Build the configured conversation database, or None when persistence is off."""
+    if backend == "off":
+        return None
+    if backend == "sqlite":
+        return HistoryDB()
+    raise ValueError(f"Unknown HISTORY_BACKEND: {backend}")
+
+# -----------------------------------------------------------------------------
+# Persistence Metrics
+# -----------------------------------------------------------------------------
+
+ROWS_WRITTEN = metrics.counter(
+    "insurebot_history_rows_written", "Conversation turns and documents committed to the database."
+)
+
+def register_metrics(db):
+    metrics.gauge(
+        "insurebot_history_queue_length", "Conversation updates waiting to be written.",
+        callback=lambda: {(): db.pending()},
+    )
@@ -0,0 +1,247 @@
+import asyncio
+import logging
+import os
+import random
+import time
+
+import groq
+import httpx
+from groq import AsyncGroq
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# -----------------------------------------------------------------------------
+# LLM Client Configuration
+# -----------------------------------------------------------------------------
+
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "500"))
+LLM_MAX_KEEPALIVE = int(os.getenv("LLM_MAX_KEEPALIVE", "100"))
+LLM_KEEPALIVE_SECONDS = float(os.getenv("LLM_KEEPALIVE_SECONDS", "120"))
+# HTTP/2 multiplexes streams over few connections; needs the optional h2 package
+LLM_HTTP2 = os.getenv("LLM_HTTP2", "1") == "1"
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "5"))
+LLM_READ_TIMEOUT = float(os.getenv("LLM_READ_TIMEOUT", "60"))
+LLM_WARMUP_CONNECTIONS = int(os.getenv("LLM_WARMUP_CONNECTIONS", "4"))
+LLM_RETRIES = int(os.getenv("LLM_RETRIES", "3"))
+LLM_RETRY_BASE_SECONDS = float(os.getenv("LLM_RETRY_BASE_SECONDS", "0.25"))
+LLM_RETRY_MAX_SECONDS = float(os.getenv("LLM_RETRY_MAX_SECONDS", "4"))
+LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "5"))
+LLM_BREAKER_RESET_SECONDS = float(os.getenv("LLM_BREAKER_RESET_SECONDS", "30"))
+
+# Failures worth another attempt: the request may succeed if sent again
+RETRYABLE_ERRORS = (
+    groq.APIConnectionError,  # includes APITimeoutError
+    groq.RateLimitError,
+    groq.InternalServerError,
+    httpx.TransportError,  # a stream dropped before its first chunk
+)
+
+# -----------------------------------------------------------------------------
+# Circuit Breaker
+# -----------------------------------------------------------------------------
+
+class CircuitOpenError(Exception):
+    """Raised without contacting the upstream while the circuit is open."""
+
+class CircuitBreaker:
+    """Fail fast after repeated upstream failures.
+
+    After `failures` consecutive retryable failures the circuit opens and
+    calls are rejected for `reset_seconds`. Then one trial call is let
+    through (half-open): success closes the circuit, failure opens it again.
+    """
+
+    CLOSED, HALF_OPEN, OPEN = 0, 1, 2
+
+    def __init__(self, failures=LLM_BREAKER_FAILURES, reset_seconds=LLM_BREAKER_RESET_SECONDS):
+        self.failures = failures
+        self.reset_seconds = reset_seconds
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._trial_running = False
+
+    def before_call(self):
+        if self.state == self.OPEN:
+            remaining = self.opened_at + self.reset_seconds - time.monotonic()
+            if remaining > 0:
+                BREAKER_REJECTIONS.inc()
+                raise CircuitOpenError(f"LLM backend unavailable, retrying in {remaining:.0f}s")
+            self._transition(self.HALF_OPEN)
+        if self.state == self.HALF_OPEN:
+            if self._trial_running:
+                BREAKER_REJECTIONS.inc()
+                raise CircuitOpenError("LLM backend unavailable, a trial request is in progress")
+            self._trial_running = True
+
+    def record_success(self):
+        self._trial_running = False
+        self.consecutive_failures = 0
+        if self.state != self.CLOSED:
+            self._transition(self.CLOSED)
+
+    def record_failure(self):
+        self._trial_running = False
+        self.consecutive_failures += 1
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failures:
+            self.opened_at = time.monotonic()
+            if self.state != self.OPEN:
+                self._transition(self.OPEN)
+
+    def release(self):
+        """End a trial call that neither succeeded nor failed upstream."""
+        self._trial_running = False
+
+    def _transition(self, state):
+        names = {self.CLOSED: "closed", self.HALF_OPEN: "half-open", self.OPEN: "open"}
+        logger.warning("LLM circuit breaker %s -> %s", names[self.state], names[state])
+        self.state = state
+        BREAKER_TRANSITIONS.labels(names[state]).inc()
+
+# -----------------------------------------------------------------------------
+# Managed Client
+# -----------------------------------------------------------------------------
+
+def _http2_available():
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+def build_http_client(http2=LLM_HTTP2):
+    """A pooled httpx client tuned for many long-lived streaming responses."""
+    if http2 and not _http2_available():
+        logger.warning("LLM_HTTP2 is on but the h2 package is missing; using HTTP/1.1")
+        http2 = False
+    return httpx.AsyncClient(
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=LLM_MAX_CONNECTIONS,
+            max_keepalive_connections=LLM_MAX_KEEPALIVE,
+            keepalive_expiry=LLM_KEEPALIVE_SECONDS,
+        ),
+        timeout=httpx.Timeout(LLM_READ_TIMEOUT, connect=LLM_CONNECT_TIMEOUT),
+    )
+
+class _PrimedStream:
+    """A completion stream whose first chunk has already been received."""
+
+    def __init__(self, first, stream):
+        self._first = first
+        self._stream = stream
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self._first is not None:
+            chunk, self._first = self._first, None
+            return chunk
+        return await self._stream.__anext__()
+
+class LLMClient:
+    """Shared Groq client with a tuned pool, warm-up, retries and a circuit breaker.
+
+    Streaming completions are retried with jittered exponential backoff on
+    retryable errors until the first chunk arrives; after that a failure is
+    the caller's to handle, since part of the answer has been shown.
+    """
+
+    def __init__(self, api_key=None, http_client=None, retries=LLM_RETRIES, breaker=None):
+        self.http_client = http_client or build_http_client()
+        # Retries are handled here so the breaker sees every failed attempt
+        self.client = AsyncGroq(api_key=api_key, http_client=self.http_client, max_retries=0)
+        self.retries = retries
+        self.breaker = breaker or CircuitBreaker()
+        self._warmed = False
+
+    async def warm_up(self, connections=LLM_WARMUP_CONNECTIONS):
+        """Open pooled connections (TCP and TLS) ahead of the first chat.
+
+        Must run on the event loop that serves requests, since pooled
+        connections belong to the loop that opened them.
+        """
+        if self._warmed:
+            return
+        self._warmed = True
+        url = self.client.base_url.join("/openai/v1/models")
+        headers = {"Authorization": f"Bearer {self.client.api_key}"}
+        start = time.perf_counter()
+        results = await asyncio.gather(
+            *(self.http_client.get(url, headers=headers) for _ in range(connections)), return_exceptions=True
+        )
+        failed = sum(isinstance(r, Exception) for r in results)
+        logger.info("LLM warm-up: %d connections in %.2fs, %d failed", connections - failed, time.perf_counter() - start, failed)
+
+    async def aclose(self):
+        await self.http_client.aclose()
+
+    async def stream(self, **kwargs):
+        """Start a streaming chat completion; returns an async iterator of chunks."""
+        for attempt in range(self.retries + 1):
+            self.breaker.before_call()
+            try:
+                completion = await self.client.chat.completions.create(stream=True, **kwargs)
+                stream = completion.__aiter__()
+                try:
+                    first = await stream.__anext__()
+                except StopAsyncIteration:
+                    first = None
+            except RETRYABLE_ERRORS as e:
+                self.breaker.record_failure()
+                if attempt == self.retries or self.breaker.state == CircuitBreaker.OPEN:
+                    raise
+                delay = self._backoff(attempt, e)
+                RETRIES.labels(type(e).__name__).inc()
+                logger.warning("LLM request failed (%s), retry %d in %.2fs", e, attempt + 1, delay)
+                await asyncio.sleep(delay)
+                continue
+            except BaseException:
+                self.breaker.release()
+                raise
+            self.breaker.record_success()
+            return _PrimedStream(first, stream) if first is not None else stream
+
+    def _backoff(self, attempt, error):
+        """Full-jitter exponential delay, stretched to any Retry-After from the server."""
+        delay = random.uniform(0, min(LLM_RETRY_MAX_SECONDS, LLM_RETRY_BASE_SECONDS * 2 ** attempt))
+        response = getattr(error, "response", None)
+        if response is not None:
+            try:
+                delay = max(delay, min(float(response.headers.get("retry-after", 0)), LLM_RETRY_MAX_SECONDS))
+            except ValueError:
+                pass
+        return delay
+
+    def pool_stats(self):
+        """Idle and active pooled connections, and requests in flight or queued."""
+        pool = getattr(getattr(self.http_client, "_transport", None), "_pool", None)
+        connections = list(getattr(pool, "connections", []))
+        idle = sum(1 for c in connections if c.is_idle())
+        return {
+            "idle": idle,
+            "active": len(connections) - idle,
+            "requests": len(getattr(pool, "_requests", [])),
+        }
+
+# -----------------------------------------------------------------------------
+# Client Metrics
+# -----------------------------------------------------------------------------
+
+RETRIES = metrics.counter("insurebot_llm_retries", "LLM requests retried, by error type.", ("error",))
+BREAKER_REJECTIONS = metrics.counter("insurebot_llm_breaker_rejections", "LLM requests rejected by the open circuit.")
+BREAKER_TRANSITIONS = metrics.counter("insurebot_llm_breaker_transitions", "Circuit breaker state changes.", ("to",))
+
+def register_metrics(client):
+    """Expose the client's pool and breaker state as scrape-time gauges."""
+    metrics.gauge(
+        "insurebot_llm_pool", "Pooled LLM connections by state, and requests in flight.", ("state",),
+        callback=client.pool_stats,
+    )
+    metrics.gauge(
+        "insurebot_llm_breaker_state", "Circuit breaker state: 0 closed, 1 half-open, 2 open.",
+        callback=lambda: {(): client.breaker.state},
+    )
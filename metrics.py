@@ -0,0 +1,272 @@
+import bisect
+import functools
+import os
+import threading
+import time
+
+# -----------------------------------------------------------------------------
+# Metrics Configuration
+# -----------------------------------------------------------------------------
+
+# With metrics off every call below is a no-op and /metrics is not mounted
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+METRICS_PATH = os.getenv("METRICS_PATH", "/metrics")
+
+# Seconds, from sub-millisecond cache hits to multi-minute document parses
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+RATE_BUCKETS = (5, 10, 25, 50, 100, 200, 400, 800)
+
+# -----------------------------------------------------------------------------
+# Metric Types
+# -----------------------------------------------------------------------------
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(names, values):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values, **kwargs):
+        """Return the child metric for one combination of label values."""
+        if kwargs:
+            values = tuple(kwargs[name] for name in self.labelnames)
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for key, child in sorted(self._children.items()):
+            lines.extend(self._render_child(key, child))
+        return lines
+
+class _Value:
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount=1):
+        self.inc(-amount)
+
+    def set(self, value):
+        self.value = value
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount=1):
+        self.labels().inc(amount)
+
+    def _render_child(self, key, child):
+        return [f"{self.name}_total{_format_labels(self.labelnames, key)} {child.value:g}"]
+
+class Gauge(_Metric):
+    """A value that goes up and down; callback gauges are read at scrape time."""
+
+    kind = "gauge"
+
+    def __init__(self, name, documentation, labelnames=(), callback=None):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+
+    def _new_child(self):
+        return _Value()
+
+    def set(self, value):
+        self.labels().set(value)
+
+    def render(self):
+        if self.callback is not None:
+            for key, value in self.callback().items():
+                self.labels(*(key if isinstance(key, tuple) else (key,))).set(value)
+        return super().render()
+
+    def _render_child(self, key, child):
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {child.value:g}"]
+
+class _HistogramChild:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value):
+        self.labels().observe(value)
+
+    def _render_child(self, key, child):
+        with child._lock:
+            counts, total = list(child.counts), child.sum
+        lines, cumulative = [], 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else f"{bound:g}"
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames + ('le',), key + (le,))} {cumulative}")
+        labels = _format_labels(self.labelnames, key)
+        lines.append(f"{self.name}_sum{labels} {total:g}")
+        lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+class _NoopMetric:
+    """Stand-in used when metrics are disabled; every operation does nothing."""
+
+    def labels(self, *values, **kwargs):
+        return self
+
+    def observe(self, value):
+        pass
+
+    def inc(self, amount=1):
+        pass
+
+    def dec(self, amount=1):
+        pass
+
+    def set(self, value):
+        pass
+
+_NOOP = _NoopMetric()
+
+# -----------------------------------------------------------------------------
+# Registry
+# -----------------------------------------------------------------------------
+
+_registry = []
+
+def _register(metric):
+    if not METRICS_ENABLED:
+        return _NOOP
+    _registry.append(metric)
+    return metric
+
+def counter(name, documentation, labelnames=()):
+    return _register(Counter(name, documentation, labelnames))
+
+def gauge(name, documentation, labelnames=(), callback=None):
+    return _register(Gauge(name, documentation, labelnames, callback))
+
+def histogram(name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+    return _register(Histogram(name, documentation, labelnames, buckets))
+
+def render():
+    """All registered metrics in the Prometheus text exposition format."""
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+def mount(app, path=METRICS_PATH):
+    """Add the scrape route to a FastAPI/Starlette app (the one behind Gradio)."""
+    if not METRICS_ENABLED:
+        return
+    from fastapi.responses import PlainTextResponse
+
+    def metrics_endpoint():
+        return PlainTextResponse(render(), media_type="text/plain; version=0.0.4")
+
+    app.add_api_route(path, metrics_endpoint, methods=["GET"], include_in_schema=False)
+
+# -----------------------------------------------------------------------------
+# Application Metrics
+# -----------------------------------------------------------------------------
+
+PHASE_SECONDS = histogram(
+    "insurebot_phase_seconds", "Time spent in each phase of handling a request.", ("phase",)
+)
+TOKENS_PER_SECOND = histogram(
+    "insurebot_stream_tokens_per_second", "Streamed chunks per second after the first token.",
+    ("endpoint",), RATE_BUCKETS
+)
+ERRORS = counter("insurebot_errors", "Requests that failed, by phase.", ("phase",))
+FALLBACKS = counter("insurebot_fallbacks", "Degraded results served instead of a full answer.", ("reason",))
+
+class _Span:
+    __slots__ = ("phase", "start")
+
+    def __init__(self, phase):
+        self.phase = phase
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        PHASE_SECONDS.labels(self.phase).observe(time.perf_counter() - self.start)
+        if exc_type is not None:
+            ERRORS.labels(self.phase).inc()
+        return False
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+_NOOP_SPAN = _NoopSpan()
+
+def span(phase):
+    """Context manager timing a phase into insurebot_phase_seconds; exceptions count as errors."""
+    return _Span(phase) if METRICS_ENABLED else _NOOP_SPAN
+
+def timed(phase):
+    """Decorator form of span(); leaves the function untouched when metrics are off."""
+    def decorate(fn):
+        if not METRICS_ENABLED:
+            return fn
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with _Span(phase):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+def observe(phase, seconds):
+    """Record a phase duration measured by the caller (e.g. across an async generator)."""
+    PHASE_SECONDS.labels(phase).observe(seconds)
+
+def fallback(reason):
+    FALLBACKS.labels(reason).inc()
+
+def error(phase):
+    ERRORS.labels(phase).inc()
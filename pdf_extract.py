@@ -0,0 +1,164 @@
+import logging
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+import metrics
+import pdf_worker
+
+logger = logging.getLogger(__name__)
+
+# -----------------------------------------------------------------------------
+# Extraction Limits
+# -----------------------------------------------------------------------------
+
+# Each worker is a separate process holding a parser; a few cover typical uploads
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", str(min(os.cpu_count() or 2, 4))))
+PDF_SHARD_PAGES = int(os.getenv("PDF_SHARD_PAGES", "25"))
+PDF_TIMEOUT_SECONDS = float(os.getenv("PDF_TIMEOUT_SECONDS", "30"))
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", "500"))
+
+# -----------------------------------------------------------------------------
+# Process Pool
+# -----------------------------------------------------------------------------
+
+_pool = None
+_pool_lock = threading.Lock()
+_spawn_lock = threading.Lock()
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # Spawned workers do not inherit the server's threads or sockets
+            _pool = ProcessPoolExecutor(max_workers=PDF_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+def _reset_pool(pool):
+    """Replace a broken or hung pool, killing its workers."""
+    global _pool
+    with _pool_lock:
+        if _pool is not pool:
+            return
+        _pool = None
+    for process in list((getattr(pool, "_processes", None) or {}).values()):
+        process.terminate()
+    pool.shutdown(wait=False, cancel_futures=True)
+
+def _submit_as_worker(pool, fn, *args):
+    """pool.submit, starting any new worker with pdf_worker as its main module.
+
+    Spawned children re-run the parent's __main__ first, which for the server
+    is app.py with gradio and every module's import-time state. Workers are
+    started inside submit, so the swap covers exactly those starts.
+    """
+    with _spawn_lock:
+        main = sys.modules["__main__"]
+        sys.modules["__main__"] = pdf_worker
+        try:
+            return pool.submit(fn, *args)
+        finally:
+            sys.modules["__main__"] = main
+
+def _submit(fn, *args):
+    pool = _get_pool()
+    try:
+        future = _submit_as_worker(pool, fn, *args)
+    except BrokenProcessPool:
+        _reset_pool(pool)
+        pool = _get_pool()
+        future = _submit_as_worker(pool, fn, *args)
+    future.pool = pool
+    return future
+
+def _abandon(futures):
+    """Cancel futures past the deadline; kill the pool of any still running."""
+    for future in futures:
+        if not future.cancel() and future.running():
+            # Other documents' in-flight shards see BrokenProcessPool and are retried once
+            _reset_pool(future.pool)
+
+# -----------------------------------------------------------------------------
+# Sharded Extraction
+# -----------------------------------------------------------------------------
+
+def _count_pages_isolated(file_path, deadline):
+    for attempt in range(2):
+        future = _submit(pdf_worker.count_pages, file_path)
+        try:
+            return future.result(timeout=max(deadline - time.monotonic(), 0))
+        except FutureTimeoutError:
+            _abandon([future])
+            raise TimeoutError("timed out while opening the PDF")
+        except BrokenProcessPool:
+            if attempt:
+                raise RuntimeError("the PDF parser crashed")
+
+def extract_pdf(file_path, timeout=None, max_pages=None, shard_pages=None):
+    """Extract page-numbered text from a PDF on the worker pool.
+
+    Pages are split into shards extracted in parallel and joined in page
+    order. Extraction stops at max_pages and at the wall-clock timeout; what
+    was read so far is returned with a notice. Returns (text, complete), where
+    complete is False when the result depends on timing or a crash and should
+    not be cached.
+    """
+    timeout = PDF_TIMEOUT_SECONDS if timeout is None else timeout
+    max_pages = PDF_MAX_PAGES if max_pages is None else max_pages
+    shard_pages = PDF_SHARD_PAGES if shard_pages is None else shard_pages
+    deadline = time.monotonic() + timeout
+
+    total = _count_pages_isolated(file_path, deadline)
+    pages = min(total, max_pages)
+    futures = {}
+    for start in range(0, pages, shard_pages):
+        shard = (start, min(start + shard_pages, pages))
+        futures[_submit(pdf_worker.extract_range, file_path, *shard)] = shard
+
+    results, retried, failed = {}, set(), False
+    while futures:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        done, _ = wait(futures, timeout=remaining, return_when=FIRST_COMPLETED)
+        for future in done:
+            shard = futures.pop(future)
+            try:
+                results[shard[0]] = future.result()
+            except BrokenProcessPool:
+                # A crash elsewhere took the pool down; give each shard one retry
+                if shard in retried:
+                    failed = True
+                else:
+                    retried.add(shard)
+                    futures[_submit(pdf_worker.extract_range, file_path, *shard)] = shard
+            except Exception as e:
+                logger.warning("Pages %d-%d of %s could not be extracted: %s", shard[0] + 1, shard[1], file_path, e)
+                failed = True
+    timed_out = bool(futures)
+    if timed_out:
+        _abandon(list(futures))
+
+    parts = [f"Total Pages: {total}\n\nContent:\n"]
+    extracted = 0
+    for start in sorted(results):
+        for i, text in results[start]:
+            extracted += 1
+            if text:
+                parts.append(f"\n--- Page {i+1} ---\n{text}\n")
+    if extracted < total:
+        if timed_out:
+            reason = f"time limit of {timeout:g} seconds reached"
+        elif failed:
+            reason = "some pages could not be parsed"
+        else:
+            reason = f"page limit of {max_pages} reached"
+        parts.append(f"\n[Partial extraction: {extracted} of {total} pages were read, {reason}.]\n")
+        logger.warning("Partial extraction of %s: %d/%d pages, %s", file_path, extracted, total, reason)
+        metrics.fallback("pdf_partial")
+    return "".join(parts), not (timed_out or failed)
@@ -0,0 +1,16 @@
+# -----------------------------------------------------------------------------
+# Worker Functions (run in child processes)
+# -----------------------------------------------------------------------------
+# The PDF pool starts its workers with this module as their main module, so it
+# must not import the app: no gradio, utils or anything with import-time state.
+
+def count_pages(file_path):
+    import PyPDF2
+    with open(file_path, "rb") as f:
+        return len(PyPDF2.PdfReader(f).pages)
+
+def extract_range(file_path, start, stop):
+    import PyPDF2
+    with open(file_path, "rb") as f:
+        reader = PyPDF2.PdfReader(f)
+        return [(i, reader.pages[i].extract_text() or "") for i in range(start, stop)]
@@ -0,0 +1,212 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import metrics
+
+# -----------------------------------------------------------------------------
+# Cache Configuration
+# -----------------------------------------------------------------------------
+
+# "memory", "sqlite" or "off"
+REC_CACHE_BACKEND = os.getenv("REC_CACHE_BACKEND", "memory")
+REC_CACHE_PATH = os.getenv("REC_CACHE_PATH", "recommendations.sqlite3")
+REC_CACHE_TTL_SECONDS = float(os.getenv("REC_CACHE_TTL_SECONDS", "86400"))
+REC_CACHE_MAX_ITEMS = int(os.getenv("REC_CACHE_MAX_ITEMS", "1000"))
+# Budgets within the same bucket share a cached recommendation
+REC_CACHE_BUDGET_BUCKET = float(os.getenv("REC_CACHE_BUDGET_BUCKET", "50"))
+
+_AMOUNT_RE = re.compile(r"(\d[\d\s,.]*)\s*([km])?\b", re.IGNORECASE)
+_MULTIPLIERS = {"k": 1_000, "m": 1_000_000}
+
+# -----------------------------------------------------------------------------
+# Key Normalization
+# -----------------------------------------------------------------------------
+
+def normalize_text(text):
+    """Case-folded text with collapsed whitespace and no trailing punctuation."""
+    return " ".join((text or "").casefold().split()).rstrip(" .!?")
+
+def parse_amount(text):
+    """Parse a coverage amount such as "$50,000", "50 000 €" or "1.5M" to a number."""
+    match = _AMOUNT_RE.search(text or "")
+    if not match:
+        return None
+    digits = re.sub(r"\s", "", match.group(1)).rstrip(".,")
+    # A single separator followed by 1-2 digits is a decimal point ("1.5", "99,95")
+    if re.fullmatch(r"\d+[.,]\d{1,2}", digits):
+        digits = digits.replace(",", ".")
+    else:
+        digits = re.sub(r"[.,]", "", digits)
+    try:
+        amount = float(digits)
+    except ValueError:
+        return None
+    return amount * _MULTIPLIERS.get((match.group(2) or "").lower(), 1)
+
+def recommendation_key(policy_details, insurance_type, coverage, budget, policy_term, num_people, currency, language):
+    """Stable cache key for a Policy Finder request."""
+    coverage_amount = parse_amount(coverage)
+    budget_bucket = None
+    if budget:
+        budget_bucket = float(budget) // REC_CACHE_BUDGET_BUCKET * REC_CACHE_BUDGET_BUCKET
+    fields = [
+        normalize_text(policy_details),
+        normalize_text(insurance_type),
+        coverage_amount if coverage_amount is not None else normalize_text(coverage),
+        budget_bucket,
+        normalize_text(policy_term),
+        int(num_people or 1),
+        currency,
+        language,
+    ]
+    return hashlib.sha256(json.dumps(fields, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+# -----------------------------------------------------------------------------
+# Storage Backends
+# -----------------------------------------------------------------------------
+
+class MemoryBackend:
+    """In-process LRU store of (value, stored_at) pairs."""
+
+    def __init__(self, max_items=REC_CACHE_MAX_ITEMS):
+        self.max_items = max_items
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._items.get(key)
+            if entry is not None:
+                self._items.move_to_end(key)
+            return entry
+
+    def set(self, key, value, stored_at):
+        with self._lock:
+            self._items[key] = (value, stored_at)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._items.pop(key, None)
+
+    def __len__(self):
+        return len(self._items)
+
+class SQLiteBackend:
+    """SQLite store shared by processes on one host, evicting least recently used rows."""
+
+    def __init__(self, path=REC_CACHE_PATH, max_items=REC_CACHE_MAX_ITEMS):
+        self.max_items = max_items
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS recommendations ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS recommendations_accessed ON recommendations (accessed_at)")
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, stored_at FROM recommendations WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                self._conn.execute(
+                    "UPDATE recommendations SET accessed_at = ? WHERE key = ?", (time.time(), key)
+                )
+            return row
+
+    def set(self, key, value, stored_at):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO recommendations VALUES (?, ?, ?, ?)", (key, value, stored_at, stored_at)
+            )
+            self._conn.execute(
+                "DELETE FROM recommendations WHERE key IN (SELECT key FROM recommendations "
+                "ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)", (self.max_items,)
+            )
+
+    def delete(self, key):
+        with self._lock:
+            self._conn.execute("DELETE FROM recommendations WHERE key = ?", (key,))
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM recommendations").fetchone()[0]
+
+# -----------------------------------------------------------------------------
+# Recommendation Cache
+# -----------------------------------------------------------------------------
+
+class RecommendationCache:
+    """TTL cache of Policy Finder answers over a pluggable backend."""
+
+    def __init__(self, backend, ttl=REC_CACHE_TTL_SECONDS):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+
+    def get(self, key):
+        """Return the cached recommendation for key, or None if absent or expired."""
+        entry = self.backend.get(key)
+        if entry is not None and time.time() - entry[1] > self.ttl:
+            self.backend.delete(key)
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry[0]
+
+    def put(self, key, value):
+        self.backend.set(key, value, time.time())
+
+    def stats(self):
+        """Hit/miss counters and current size."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "refreshes": self.refreshes,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "items": len(self.backend),
+        }
+
+def create_recommendation_cache(backend=REC_CACHE_BACKEND):
+    """Build the configured cache, or None when caching is turned off."""
+    if backend == "off":
+        return None
+    if backend == "sqlite":
+        return RecommendationCache(SQLiteBackend())
+    if backend == "memory":
+        return RecommendationCache(MemoryBackend())
+    raise ValueError(f"Unknown REC_CACHE_BACKEND: {backend}")
+
+# -----------------------------------------------------------------------------
+# Cache Metrics
+# -----------------------------------------------------------------------------
+
+def register_metrics(cache):
+    metrics.gauge(
+        "insurebot_rec_cache_lookups", "Policy Finder cache lookups, by result.", ("result",),
+        callback=lambda: {"hit": cache.hits, "miss": cache.misses, "refresh": cache.refreshes},
+    )
+    metrics.gauge(
+        "insurebot_rec_cache_hit_ratio", "Share of Policy Finder lookups served from the cache.",
+        callback=lambda: {(): cache.stats()["hit_rate"]},
+    )
+    metrics.gauge(
+        "insurebot_rec_cache_items", "Policy Finder recommendations held in the cache.",
+        callback=lambda: {(): len(cache.backend)},
+    )
@@ -0,0 +1,189 @@
+import math
+import os
+import re
+import sys
+from collections import Counter
+
+import numpy as np
+
+# -----------------------------------------------------------------------------
+# Retrieval Configuration
+# -----------------------------------------------------------------------------
+
+RETRIEVAL_TOP_K = int(os.getenv("RETRIEVAL_TOP_K", "4"))
+RETRIEVAL_CHUNK_WORDS = int(os.getenv("RETRIEVAL_CHUNK_WORDS", "180"))
+RETRIEVAL_CHUNK_OVERLAP = int(os.getenv("RETRIEVAL_CHUNK_OVERLAP", "30"))
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+_PAGE_RE = re.compile(r"--- Page (\d+) ---")
+
+# Common English and French words that carry no retrieval signal
+STOPWORDS = frozenset("""
+a an and are as at be by can do does for from has have how i in is it its me my
+of on or our should that the their this to was what when which who will with you
+your au aux avec ce ces dans de des du elle en est et il je la le les leur ma mes
+mon ne nous on ou par pas pour qu que qui sa se ses son sur ta te tu un une vos
+votre vous
+""".split())
+
+# -----------------------------------------------------------------------------
+# Chunking
+# -----------------------------------------------------------------------------
+
+def tokenize(text):
+    """Lower-cased word terms used for indexing and querying."""
+    return [t for t in _WORD_RE.findall(text.lower()) if t not in STOPWORDS]
+
+def chunk_document(text, chunk_words=None, overlap=None):
+    """Split extracted document text into overlapping word windows.
+
+    Returns (page, chunk_text) pairs, where page is the PDF page the chunk
+    starts on, or None for documents without page markers.
+    """
+    chunk_words = RETRIEVAL_CHUNK_WORDS if chunk_words is None else chunk_words
+    overlap = RETRIEVAL_CHUNK_OVERLAP if overlap is None else overlap
+    pages = [(m.start(), int(m.group(1))) for m in _PAGE_RE.finditer(text)]
+    spans = [m.span() for m in re.finditer(r"\S+", text)]
+    chunks = []
+    step = max(chunk_words - overlap, 1)
+    for start in range(0, len(spans), step):
+        window = spans[start:start + chunk_words]
+        begin, end = window[0][0], window[-1][1]
+        page = None
+        for offset, number in pages:
+            if offset > begin:
+                break
+            page = number
+        chunks.append((page, text[begin:end]))
+        if start + chunk_words >= len(spans):
+            break
+    return chunks
+
+# -----------------------------------------------------------------------------
+# BM25 Index
+# -----------------------------------------------------------------------------
+
+class BM25Index:
+    """Okapi BM25 over a fixed set of chunks, scored with NumPy.
+
+    Postings are stored per term as parallel arrays of chunk ids and term
+    frequencies, so scoring a query touches only the chunks containing its
+    terms and does the arithmetic one vectorized term at a time.
+    """
+
+    def __init__(self, chunk_texts, k1=1.5, b=0.75):
+        self.k1, self.b = k1, b
+        postings = {}
+        lengths = np.zeros(len(chunk_texts), dtype=np.float32)
+        for chunk_id, text in enumerate(chunk_texts):
+            terms = tokenize(text)
+            lengths[chunk_id] = len(terms)
+            for term, tf in Counter(terms).items():
+                postings.setdefault(term, ([], []))
+                postings[term][0].append(chunk_id)
+                postings[term][1].append(tf)
+        self.size = len(chunk_texts)
+        self.lengths = lengths
+        self.avg_length = float(lengths.mean()) if self.size else 0.0
+        self.postings = {
+            term: (np.array(ids, dtype=np.int32), np.array(tfs, dtype=np.float32))
+            for term, (ids, tfs) in postings.items()
+        }
+
+    def scores(self, query):
+        """BM25 score of every chunk for the query."""
+        scores = np.zeros(self.size, dtype=np.float32)
+        if not self.size:
+            return scores
+        norm = self.k1 * (1 - self.b + self.b * self.lengths / max(self.avg_length, 1.0))
+        for term in set(tokenize(query)):
+            if term not in self.postings:
+                continue
+            ids, tfs = self.postings[term]
+            idf = math.log(1 + (self.size - len(ids) + 0.5) / (len(ids) + 0.5))
+            scores[ids] += idf * tfs * (self.k1 + 1) / (tfs + norm[ids])
+        return scores
+
+    def top(self, query, k):
+        """Ids of the k best-scoring chunks with a positive score, best first."""
+        scores = self.scores(query)
+        k = min(k, self.size)
+        if not k:
+            return []
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best])]
+        return [int(i) for i in best if scores[i] > 0]
+
+# -----------------------------------------------------------------------------
+# Per-Session Document Store
+# -----------------------------------------------------------------------------
+
+class DocumentIndex:
+    """Uploaded documents of one chat session, chunked and searchable."""
+
+    def __init__(self):
+        self.documents = []
+        self._chunks = []
+        self._index = None
+
+    def __len__(self):
+        return len(self.documents)
+
+    def add(self, name, metadata, text):
+        """Chunk and index a document; returns the number of chunks."""
+        return self.add_chunks(name, metadata, chunk_document(text))
+
+    def add_chunks(self, name, metadata, chunks):
+        """Index a document already split into (page, text) chunks."""
+        doc_id = len(self.documents)
+        self.documents.append({"name": name, "metadata": metadata.strip(), "chunks": len(chunks)})
+        self._chunks.extend((doc_id, page, chunk) for page, chunk in chunks)
+        # Sessions hold a handful of documents, so a rebuild on upload is cheap
+        self._index = None
+        return len(chunks)
+
+    def export(self, doc_id):
+        """(name, metadata, [(page, text), ...]) of a document, for add_chunks."""
+        document = self.documents[doc_id]
+        chunks = [(page, chunk) for i, page, chunk in self._chunks if i == doc_id]
+        return document["name"], document["metadata"], chunks
+
+    def nbytes(self):
+        """Approximate memory held by the chunk texts."""
+        return sum(sys.getsizeof(chunk) for _, _, chunk in self._chunks)
+
+    def search(self, query, k=None):
+        """Return (document name, page, text) for the chunks most relevant to query.
+
+        An empty query returns the opening chunks of the latest document, so an
+        upload without a question still gives the model something to summarize.
+        """
+        k = RETRIEVAL_TOP_K if k is None else k
+        if not self._chunks:
+            return []
+        if not query.strip():
+            latest = len(self.documents) - 1
+            ids = [i for i, chunk in enumerate(self._chunks) if chunk[0] == latest][:k]
+        else:
+            if self._index is None:
+                self._index = BM25Index([chunk for _, _, chunk in self._chunks])
+            ids = self._index.top(query, k)
+        return [
+            (self.documents[self._chunks[i][0]]["name"], self._chunks[i][1], self._chunks[i][2])
+            for i in ids
+        ]
+
+    def prompt_context(self, query, k=None):
+        """System prompt section with document metadata and relevant excerpts."""
+        if not self.documents:
+            return ""
+        lines = ["The user has uploaded these documents:"]
+        for document in self.documents:
+            lines.append(document["metadata"].replace("\n", " | "))
+        excerpts = self.search(query, k)
+        if excerpts:
+            lines.append("\nExcerpts most relevant to the user's latest message:")
+            for name, page, text in excerpts:
+                source = f"{name}, page {page}" if page else name
+                lines.append(f"[{source}]\n{text}")
+        return "\n".join(lines)
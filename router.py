@@ -0,0 +1,185 @@
+import os
+import re
+import threading
+
+import metrics
+
+# -----------------------------------------------------------------------------
+# Routing Configuration
+# -----------------------------------------------------------------------------
+
+ROUTER_ENABLED = os.getenv("ROUTER_ENABLED", "1") == "1"
+ROUTER_FAST_MODEL = os.getenv("ROUTER_FAST_MODEL", "llama-3.1-8b-instant")
+ROUTER_CHAT_MODEL = os.getenv("ROUTER_CHAT_MODEL", "llama-3.3-70b-versatile")
+ROUTER_POLICY_MODEL = os.getenv("ROUTER_POLICY_MODEL", "llama3-70b-8192")
+# Standard requests move to the fast model when the large one is expected to
+# take longer than this to deliver a typical answer
+ROUTER_LATENCY_BUDGET_SECONDS = float(os.getenv("ROUTER_LATENCY_BUDGET_SECONDS", "8"))
+ROUTER_FAST_MAX_TOKENS = int(os.getenv("ROUTER_FAST_MAX_TOKENS", "512"))
+# While standard requests are diverted, every Nth still goes to the large model
+# so its rolling latency can recover
+ROUTER_PROBE_EVERY = max(1, int(os.getenv("ROUTER_PROBE_EVERY", "10")))
+
+CHAT_MAX_TOKENS = 5000
+POLICY_MAX_TOKENS = 2048
+# Answer length assumed when estimating a model's end-to-end latency
+_TYPICAL_ANSWER_TOKENS = 400
+# Weight of the newest sample in the rolling averages
+_EWMA_ALPHA = 0.2
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+_SMALL_TALK_RE = re.compile(
+    r"^\W*(hi|hello|hey|yo|thanks?( you)?|thank you( so much)?|ok(ay)?|cool|great|bye|goodbye|"
+    r"good (morning|afternoon|evening|night)|bonjour|bonsoir|salut|coucou|merci( beaucoup)?|"
+    r"d'accord|au revoir|bonne (journée|soirée|nuit))\b[\w\s!.,?']*$",
+    re.IGNORECASE,
+)
+INSURANCE_TERMS = frozenset("""
+insurance insure insured insurer policy policies premium premiums coverage cover covered claim claims
+deductible quote quotes liability beneficiary rider term annuity underwriting car auto vehicle home house
+renters life health medical travel dental disability pet flood fire theft accident
+assurance assuré assureur police prime primes couverture sinistre franchise devis responsabilité
+bénéficiaire voiture habitation logement vie santé voyage invalidité vol incendie inondation
+""".split())
+
+# -----------------------------------------------------------------------------
+# Model Statistics
+# -----------------------------------------------------------------------------
+
+class ModelStats:
+    """Rolling (exponentially weighted) TTFT and streaming rate of one model."""
+
+    def __init__(self):
+        self.ttft = None
+        self.tokens_per_second = None
+        self.samples = 0
+
+    def record(self, ttft, tokens_per_second):
+        self.samples += 1
+        if ttft is not None:
+            self.ttft = ttft if self.ttft is None else self.ttft + _EWMA_ALPHA * (ttft - self.ttft)
+        if tokens_per_second:
+            self.tokens_per_second = tokens_per_second if self.tokens_per_second is None else (
+                self.tokens_per_second + _EWMA_ALPHA * (tokens_per_second - self.tokens_per_second)
+            )
+
+    def expected_latency(self, answer_tokens=_TYPICAL_ANSWER_TOKENS):
+        """Expected seconds to deliver an answer, or None before any sample."""
+        if self.ttft is None or not self.tokens_per_second:
+            return None
+        return self.ttft + answer_tokens / self.tokens_per_second
+
+# -----------------------------------------------------------------------------
+# Router
+# -----------------------------------------------------------------------------
+
+class Route:
+    __slots__ = ("model", "max_tokens", "reason")
+
+    def __init__(self, model, max_tokens, reason):
+        self.model = model
+        self.max_tokens = max_tokens
+        self.reason = reason
+
+    def __repr__(self):
+        return f"Route({self.model}, max_tokens={self.max_tokens}, {self.reason})"
+
+def classify_chat(text, attachments=0, documents=0, prompt_tokens=0, turn=0):
+    """"trivial", "standard" or "complex" from cheap local features of a chat turn.
+
+    turn is the number of messages before this one. Only an opening greeting
+    or thanks is trivial: later in a conversation a short message such as
+    "What about for my kids?" usually refers back to insurance.
+    """
+    text = text or ""
+    words = _WORD_RE.findall(text.lower())
+    if attachments or documents or prompt_tokens > 3000 or len(words) > 80 or text.count("?") > 2:
+        return "complex"
+    on_topic = any(word in INSURANCE_TERMS for word in words)
+    if turn == 0 and not on_topic and len(words) <= 12 and _SMALL_TALK_RE.match(text):
+        # Greetings and thanks get a short answer
+        return "trivial"
+    return "standard"
+
+class ModelRouter:
+    """Pick a model per request from its complexity and the models' recent latency.
+
+    Trivial turns go to the fast model. Standard turns go to the endpoint's
+    large model unless its rolling latency estimate exceeds the budget while
+    the fast model would be quicker; a few diverted requests still probe the
+    large model so it is picked again once it recovers. Complex turns always
+    use the large model.
+    """
+
+    def __init__(self, enabled=ROUTER_ENABLED, fast_model=ROUTER_FAST_MODEL,
+                 budget=ROUTER_LATENCY_BUDGET_SECONDS):
+        self.enabled = enabled
+        self.fast_model = fast_model
+        self.budget = budget
+        self.stats = {}
+        self._diverted = 0
+        self._lock = threading.Lock()
+
+    def route_chat(self, text, attachments=0, documents=0, prompt_tokens=0, turn=0, override=None):
+        complexity = classify_chat(text, attachments, documents, prompt_tokens, turn)
+        return self._decide("chat", ROUTER_CHAT_MODEL, CHAT_MAX_TOKENS, complexity, override)
+
+    def route_policy(self, override=None):
+        # A recommendation is never small talk, but it can still fall back under load
+        return self._decide("policy", ROUTER_POLICY_MODEL, POLICY_MAX_TOKENS, "standard", override)
+
+    def _decide(self, endpoint, large_model, max_tokens, complexity, override):
+        if override:
+            route = Route(override, max_tokens, "override")
+        elif not self.enabled:
+            route = Route(large_model, max_tokens, "disabled")
+        elif complexity == "trivial":
+            route = Route(self.fast_model, min(max_tokens, ROUTER_FAST_MAX_TOKENS), "trivial")
+        elif complexity == "standard" and self._too_slow(large_model):
+            route = Route(self.fast_model, max_tokens, "large_model_slow")
+        else:
+            route = Route(large_model, max_tokens, complexity)
+        DECISIONS.labels(endpoint, route.model, route.reason).inc()
+        return route
+
+    def _too_slow(self, large_model):
+        with self._lock:
+            large = self.stats.get(large_model)
+            fast = self.stats.get(self.fast_model)
+            large_latency = large.expected_latency() if large else None
+            fast_latency = fast.expected_latency() if fast else None
+        if large_latency is None or large_latency <= self.budget:
+            return False
+        # Without data on the fast model, give it a chance to prove itself
+        if fast_latency is not None and fast_latency >= large_latency:
+            return False
+        with self._lock:
+            self._diverted += 1
+            return self._diverted % ROUTER_PROBE_EVERY != 0
+
+    def record(self, model, ttft, tokens_per_second):
+        """Feed a finished completion's TTFT and streaming rate into the rolling stats."""
+        with self._lock:
+            self.stats.setdefault(model, ModelStats()).record(ttft, tokens_per_second)
+
+    def snapshot(self):
+        with self._lock:
+            return {model: (s.ttft, s.tokens_per_second, s.samples) for model, s in self.stats.items()}
+
+# -----------------------------------------------------------------------------
+# Router Metrics
+# -----------------------------------------------------------------------------
+
+DECISIONS = metrics.counter(
+    "insurebot_route_decisions", "Model routing decisions.", ("endpoint", "model", "reason")
+)
+
+def register_metrics(router):
+    metrics.gauge(
+        "insurebot_model_ttft_seconds", "Rolling time to first token per model.", ("model",),
+        callback=lambda: {m: s[0] for m, s in router.snapshot().items() if s[0] is not None},
+    )
+    metrics.gauge(
+        "insurebot_model_tokens_per_second", "Rolling streaming rate per model.", ("model",),
+        callback=lambda: {m: s[1] for m, s in router.snapshot().items() if s[1] is not None},
+    )
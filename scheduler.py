@@ -0,0 +1,204 @@
+import asyncio
+import os
+import time
+from collections import OrderedDict, deque
+
+import metrics
+
+# -----------------------------------------------------------------------------
+# Scheduler Configuration
+# -----------------------------------------------------------------------------
+
+# Upstream limits of the Groq organization; 0 leaves that dimension unlimited
+LLM_RPM_LIMIT = int(os.getenv("LLM_RPM_LIMIT", "0"))
+LLM_TPM_LIMIT = int(os.getenv("LLM_TPM_LIMIT", "0"))
+# Completion tokens charged up front; the difference is settled on release
+LLM_COMPLETION_TOKENS_ESTIMATE = int(os.getenv("LLM_COMPLETION_TOKENS_ESTIMATE", "800"))
+
+# Priority classes, served strictly in this order
+CHAT, POLICY, BATCH = 0, 1, 2
+PRIORITY_NAMES = {CHAT: "chat", POLICY: "policy", BATCH: "batch"}
+
+# -----------------------------------------------------------------------------
+# Token Buckets
+# -----------------------------------------------------------------------------
+
+class TokenBucket:
+    """Refills continuously to `per_minute`; a capacity of 0 means unlimited."""
+
+    def __init__(self, per_minute):
+        self.capacity = per_minute
+        self.level = float(per_minute)
+        self.rate = per_minute / 60.0
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount):
+        """Seconds until amount can be taken (requests larger than the bucket wait for a full one)."""
+        if not self.capacity:
+            return 0.0
+        self._refill()
+        return max(min(amount, self.capacity) - self.level, 0.0) / self.rate
+
+    def take(self, amount):
+        if self.capacity:
+            self._refill()
+            self.level -= amount
+
+    def give(self, amount):
+        if self.capacity:
+            self._refill()
+            self.level = min(self.capacity, self.level + amount)
+
+# -----------------------------------------------------------------------------
+# Fair Scheduler
+# -----------------------------------------------------------------------------
+
+class Ticket:
+    """A queued completion request; granted once the buckets allow it."""
+
+    def __init__(self, scheduler, key, priority, tokens):
+        self.scheduler = scheduler
+        self.key = key
+        self.priority = priority
+        self.tokens = tokens
+        self.enqueued = time.monotonic()
+        self.released = False
+        self._future = asyncio.get_running_loop().create_future()
+
+    @property
+    def granted(self):
+        return self._future.done()
+
+    async def wait(self, timeout=None):
+        """Wait up to timeout seconds for the grant; returns whether it came."""
+        try:
+            await asyncio.wait_for(asyncio.shield(self._future), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    def position(self):
+        """1-based place in line, or 0 once granted."""
+        return 0 if self.granted else self.scheduler.position(self)
+
+    def release(self, actual_tokens=None):
+        """Settle the token estimate against actual usage and free the slot.
+
+        Cancels the request if it is still waiting; safe to call twice.
+        """
+        if self.released:
+            return
+        self.released = True
+        self.scheduler._release(self, actual_tokens)
+
+class FairScheduler:
+    """Admit completion calls under requests- and tokens-per-minute limits.
+
+    Waiting requests are served by priority class (chat, then Policy Finder,
+    then batch work) and, within a class, round-robin across sessions, so a
+    session with many queued requests cannot starve the others. Each request
+    is charged its prompt plus an estimated completion up front; the
+    estimate is corrected when the request finishes.
+    """
+
+    def __init__(self, rpm=LLM_RPM_LIMIT, tpm=LLM_TPM_LIMIT):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self._queues = {priority: OrderedDict() for priority in PRIORITY_NAMES}
+        self._timer = None
+
+    @property
+    def limited(self):
+        return bool(self.requests.capacity or self.tokens.capacity)
+
+    def enqueue(self, key, priority, tokens):
+        """Queue a request for session key; returns its Ticket (granted at once if possible)."""
+        ticket = Ticket(self, key, priority, tokens)
+        if not self.limited:
+            ticket._future.set_result(True)
+            return ticket
+        self._queues[priority].setdefault(key, deque()).append(ticket)
+        self._dispatch()
+        return ticket
+
+    def queued(self, priority=None):
+        """Number of waiting requests, in one class or overall."""
+        classes = [priority] if priority is not None else list(self._queues)
+        return sum(len(q) for p in classes for q in self._queues[p].values())
+
+    def position(self, ticket):
+        ahead = sum(self.queued(p) for p in self._queues if p < ticket.priority)
+        sessions = self._queues[ticket.priority]
+        if ticket.key not in sessions or ticket not in sessions[ticket.key]:
+            return 0
+        index = sessions[ticket.key].index(ticket)
+        before_own = True
+        for key, waiting in sessions.items():
+            if key == ticket.key:
+                before_own = False
+                continue
+            # Earlier sessions in the rotation get one more turn before ours
+            ahead += min(len(waiting), index + 1 if before_own else index)
+        return ahead + index + 1
+
+    def _head(self):
+        for priority in sorted(self._queues):
+            sessions = self._queues[priority]
+            if sessions:
+                return sessions[next(iter(sessions))][0]
+        return None
+
+    def _dispatch(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while True:
+            ticket = self._head()
+            if ticket is None:
+                return
+            wait = max(self.requests.wait_time(1), self.tokens.wait_time(ticket.tokens))
+            if wait > 0:
+                self._timer = asyncio.get_running_loop().call_later(wait, self._dispatch)
+                return
+            sessions = self._queues[ticket.priority]
+            waiting = sessions.pop(ticket.key)
+            waiting.popleft()
+            if waiting:
+                # The session goes to the back of the rotation
+                sessions[ticket.key] = waiting
+            self.requests.take(1)
+            self.tokens.take(ticket.tokens)
+            QUEUE_WAIT.labels(PRIORITY_NAMES[ticket.priority]).observe(time.monotonic() - ticket.enqueued)
+            ticket._future.set_result(True)
+
+    def _release(self, ticket, actual_tokens):
+        if not ticket.granted:
+            waiting = self._queues[ticket.priority].get(ticket.key)
+            if waiting is not None and ticket in waiting:
+                waiting.remove(ticket)
+                if not waiting:
+                    del self._queues[ticket.priority][ticket.key]
+            ticket._future.cancel()
+        elif actual_tokens is not None:
+            self.tokens.give(ticket.tokens - actual_tokens)
+        if self.limited:
+            self._dispatch()
+
+# -----------------------------------------------------------------------------
+# Scheduler Metrics
+# -----------------------------------------------------------------------------
+
+QUEUE_WAIT = metrics.histogram(
+    "insurebot_llm_queue_wait_seconds", "Time completion requests waited for a rate-limit slot.", ("priority",)
+)
+
+def register_metrics(scheduler):
+    metrics.gauge(
+        "insurebot_llm_queue_length", "Completion requests waiting for a rate-limit slot.", ("priority",),
+        callback=lambda: {name: scheduler.queued(priority) for priority, name in PRIORITY_NAMES.items()},
+    )
@@ -0,0 +1,199 @@
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+import metrics
+from attachments import PendingAttachments
+from context import ContextState
+from retrieval import DocumentIndex
+
+# -----------------------------------------------------------------------------
+# Session Store Configuration
+# -----------------------------------------------------------------------------
+
+# Conversations untouched for this long are forgotten
+SESSION_IDLE_SECONDS = float(os.getenv("SESSION_IDLE_SECONDS", "3600"))
+# Once all sessions together hold more than this, the least recently used go first
+SESSION_STORE_MAX_MB = float(os.getenv("SESSION_STORE_MAX_MB", "256"))
+
+# Approximate size of a Turn and of a session's fixed state, for the memory cap
+_TURN_BYTES = 72
+_SESSION_BYTES = 2048
+
+# -----------------------------------------------------------------------------
+# Chat Session State
+# -----------------------------------------------------------------------------
+
+class Turn:
+    """One message of the transcript shown to the user.
+
+    An uploaded document's turn holds only its metadata line; the body lives
+    in the session's DocumentIndex and document is its position there.
+    """
+
+    __slots__ = ("role", "content", "document")
+
+    def __init__(self, role, content, document=None):
+        self.role = role
+        # Text, or a one-element tuple holding the path of an audio clip
+        self.content = content
+        self.document = document
+
+    def message(self):
+        """The turn in Gradio's messages format."""
+        return {"role": self.role, "content": self.content}
+
+    def nbytes(self):
+        content = self.content if isinstance(self.content, str) else self.content[0]
+        return _TURN_BYTES + sys.getsizeof(content)
+
+class ChatSession:
+    """Per-conversation state kept on the server between chat turns."""
+
+    def __init__(self, session_id=None):
+        # Identifies the conversation to the store and the fair request scheduler
+        self.id = session_id or uuid.uuid4().hex
+        # Transcript of the conversation; the browser only receives new turns
+        self.history = []
+        # Rolling summary of turns evicted from the prompt budget
+        self.context = ContextState()
+        # Uploaded documents, retrieved from instead of pasted into the prompt
+        self.documents = DocumentIndex()
+        # Attachment processing started at upload time, before the message is sent
+        self.attachments = PendingAttachments()
+        self.last_used = time.monotonic()
+        # Size last reported to the store
+        self.bytes = 0
+        # Durable id of the conversation when it is persisted (see history_db)
+        self.conversation = None
+        # Position in the conversation of history[0]; older turns are only on disk
+        self.offset = 0
+        # Position of the oldest turn the browser has been sent
+        self.shown_from = 0
+        # Turns and documents already handed to the database
+        self.saved = 0
+        self.saved_documents = 0
+
+    def add(self, message, document=None):
+        """Append a messages-format dict to the transcript and return its Turn."""
+        turn = Turn(message["role"], message["content"], document)
+        self.history.append(turn)
+        return turn
+
+    def forget_summarized(self):
+        """Drop saved turns that were already folded into the prompt summary.
+
+        The server only needs turns that can still enter the prompt; the
+        browser already shows the rest, and the database keeps them.
+        """
+        count = min(self.context.summarized, self.saved)
+        if count:
+            del self.history[:count]
+            self.offset += count
+            self.saved -= count
+            self.context.summarized -= count
+
+    def messages(self):
+        """The transcript in Gradio's messages format, for prompt assembly."""
+        return [turn.message() for turn in self.history]
+
+    def nbytes(self):
+        """Approximate memory held by the transcript and document chunks."""
+        return (
+            _SESSION_BYTES
+            + sum(turn.nbytes() for turn in self.history)
+            + self.documents.nbytes()
+        )
+
+# -----------------------------------------------------------------------------
+# Session Store
+# -----------------------------------------------------------------------------
+
+class SessionStore:
+    """Chat sessions keyed by id, kept in order of last use.
+
+    Sessions idle for longer than idle_seconds are dropped, and so are the
+    least recently used ones while all sessions together exceed max_bytes.
+    Sizes are re-measured after each turn with update(). The session being
+    served is never dropped.
+    """
+
+    def __init__(self, idle_seconds=SESSION_IDLE_SECONDS, max_bytes=int(SESSION_STORE_MAX_MB * (1 << 20)),
+                 clock=time.monotonic):
+        self.idle_seconds = idle_seconds
+        self.max_bytes = max_bytes
+        self._clock = clock
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def get(self, session_id):
+        """The session for session_id, created on first use."""
+        now = self._clock()
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = self._sessions[session_id] = ChatSession(session_id)
+                session.bytes = session.nbytes()
+                self.bytes += session.bytes
+            else:
+                self._sessions.move_to_end(session_id)
+            session.last_used = now
+            self._evict(now, session_id)
+        return session
+
+    def update(self, session):
+        """Re-measure a session after it changed and enforce the memory cap."""
+        size = session.nbytes()
+        with self._lock:
+            if self._sessions.get(session.id) is not session:
+                return  # Evicted or discarded while it was in use
+            self._sessions.move_to_end(session.id)
+            self.bytes += size - session.bytes
+            session.bytes = size
+            self._evict(self._clock(), session.id)
+
+    def discard(self, session_id):
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+            if session is not None:
+                self.bytes -= session.bytes
+
+    def _evict(self, now, keep):
+        # Least recently used first, so idle sessions are always at the front
+        # and the session being served, just moved to the end, is reached last
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if session_id == keep:
+                break
+            if now - session.last_used > self.idle_seconds:
+                reason = "idle"
+            elif self.bytes > self.max_bytes:
+                reason = "memory"
+            else:
+                break
+            del self._sessions[session_id]
+            self.bytes -= session.bytes
+            EVICTIONS.labels(reason).inc()
+
+# -----------------------------------------------------------------------------
+# Session Metrics
+# -----------------------------------------------------------------------------
+
+EVICTIONS = metrics.counter("insurebot_session_evictions", "Chat sessions dropped from the store.", ("reason",))
+
+def register_metrics(store):
+    metrics.gauge(
+        "insurebot_sessions", "Chat sessions held in the store.",
+        callback=lambda: {(): len(store)},
+    )
+    metrics.gauge(
+        "insurebot_session_store_bytes", "Approximate memory held by stored chat sessions.",
+        callback=lambda: {(): store.bytes},
+    )
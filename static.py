@@ -180,12 +180,44 @@ function toggleTheme() {
 }
 """
 
+# Event handler that reduces the multimodal textbox value to its list of
+# attached files. The list is returned as a string, which compares equal
+# while the files stay the same, so the component holding it only fires
+# change when a file is added or removed, not on every keystroke.
+JS_ATTACHED_FILES = """
+(message) => [JSON.stringify(((message || {}).files || []).map((file) => file.path || file.url))]
+"""
+
+# Event handler that merges a transcript delta from the server into the
+# chatbot's messages. Messages carry their position in the conversation as
+# metadata.id; the delta replaces positions start to end (or to the end of
+# the transcript). When the server lost the conversation and numbers it
+# from 0 again, the delta carries a reset notice: the messages on screen are
+# kept in front of it, renumbered below 0 so later updates leave them alone.
+# The result is wrapped because Gradio would otherwise read a list as one
+# value per output.
+JS_APPLY_TRANSCRIPT_DELTA = """
+(delta, history) => {
+    if (!delta) return [history];
+    const seq = (message) => (message.metadata || {}).id;
+    history = history || [];
+    if (delta.reset && history.length) {
+        const shift = Math.max(...history.map(seq)) + 2;
+        history = history
+            .map((message) => ({...message, metadata: {...message.metadata, id: seq(message) - shift}}))
+            .concat([delta.reset]);
+    }
+    const before = history.filter((message) => seq(message) < delta.start);
+    const after = delta.end == null ? [] : history.filter((message) => seq(message) >= delta.end);
+    return [before.concat(delta.messages, after)];
+}
+"""
+
 # ----------------------------------------------------------------------------- 
 # CSS Styles 
 # -----------------------------------------------------------------------------
 
 STYLE = """
-<style>
   #gradio-animation {
     margin: 40px 0;
   }
@@ -386,13 +418,12 @@ STYLE = """
     background-color: #ffffff !important;
     color: #000000 !important;
   }
-</style>
 """
 
-# Additional script to reset styles in light mode
+# Additional script to reset styles in light mode. It may be loaded after the
+# document has finished parsing, so it starts at once in that case.
 THEME_RESET_SCRIPT = """
-<script>
-document.addEventListener('DOMContentLoaded', function() {
+function initThemeReset() {
     // Create a function to reset all dropdown styles when in light mode
     function resetLightModeStyles() {
         if (!document.body.classList.contains('dark-mode') && document.body.classList.contains('light-mode')) {
@@ -440,6 +471,10 @@ document.addEventListener('DOMContentLoaded', function() {
             resetLightModeStyles();
         }
     }, 2000);
-});
-</script>
+}
+if (document.readyState === 'loading') {
+    document.addEventListener('DOMContentLoaded', initThemeReset);
+} else {
+    initThemeReset();
+}
 """
\ No newline at end of file
@@ -0,0 +1,53 @@
+import os
+import time
+
+# -----------------------------------------------------------------------------
+# Stream Coalescing
+# -----------------------------------------------------------------------------
+
+# Push a UI update at most every STREAM_FLUSH_MS milliseconds, or sooner once
+# STREAM_FLUSH_CHARS characters are pending. Set both to 0 to push every token.
+STREAM_FLUSH_MS = float(os.getenv("STREAM_FLUSH_MS", "50"))
+STREAM_FLUSH_CHARS = int(os.getenv("STREAM_FLUSH_CHARS", "64"))
+
+class StreamBuffer:
+    """Collect streamed tokens and decide when the UI should be updated.
+
+    Fragments are kept in a list and only joined on flush, so building a long
+    response costs one join per UI update instead of one copy per token.
+    """
+
+    def __init__(self, flush_ms=None, flush_chars=None, clock=time.monotonic):
+        self.flush_ms = STREAM_FLUSH_MS if flush_ms is None else flush_ms
+        self.flush_chars = STREAM_FLUSH_CHARS if flush_chars is None else flush_chars
+        self._clock = clock
+        self._parts = []
+        self._pending = 0
+        self._text = ""
+        self._last_flush = clock()
+
+    @property
+    def pending(self):
+        """Number of characters received since the last flush."""
+        return self._pending
+
+    def append(self, fragment):
+        """Add a streamed fragment; return True when an update is due."""
+        if fragment:
+            self._parts.append(fragment)
+            self._pending += len(fragment)
+        if not self._pending:
+            return False
+        # Paint the first fragment immediately so time-to-first-token is not delayed
+        if not self._text or self._pending >= self.flush_chars:
+            return True
+        return (self._clock() - self._last_flush) * 1000 >= self.flush_ms
+
+    def flush(self):
+        """Commit pending fragments and return the full text so far."""
+        if self._parts:
+            self._text += "".join(self._parts)
+            self._parts.clear()
+        self._pending = 0
+        self._last_flush = self._clock()
+        return self._text
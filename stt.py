@@ -0,0 +1,249 @@
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# -----------------------------------------------------------------------------
+# Speech-to-Text Configuration
+# -----------------------------------------------------------------------------
+
+# "google" (online), "sphinx" or "whisper" (offline, optional dependencies)
+STT_ENGINE = os.getenv("STT_ENGINE", "google")
+STT_WORKERS = int(os.getenv("STT_WORKERS", "4"))
+# Long recordings are split on silence into chunks of at most this length
+STT_CHUNK_SECONDS = float(os.getenv("STT_CHUNK_SECONDS", "30"))
+STT_MIN_SILENCE_MS = int(os.getenv("STT_MIN_SILENCE_MS", "400"))
+# Pauses longer than this are shortened to it before recognition
+STT_MAX_PAUSE_MS = int(os.getenv("STT_MAX_PAUSE_MS", "600"))
+# Frames quieter than the noise floor plus this margin count as silence
+STT_VAD_MARGIN_DB = float(os.getenv("STT_VAD_MARGIN_DB", "12"))
+STT_WHISPER_MODEL = os.getenv("STT_WHISPER_MODEL", "base")
+
+STT_SAMPLE_RATE = 16000
+_VAD_FRAME_MS = 20
+# Speech frames are padded by this much so word onsets and endings are kept
+_VAD_PAD_MS = 200
+
+STT_LANGUAGES = {
+    "🇬🇧 English": "en-US",
+    "🇫🇷 Français": "fr-FR"
+}
+
+_executor = ThreadPoolExecutor(max_workers=STT_WORKERS, thread_name_prefix="stt")
+
+def _speech_recognition():
+    """speech_recognition, imported when the first voice note arrives rather than at startup."""
+    import speech_recognition
+    return speech_recognition
+
+# -----------------------------------------------------------------------------
+# Transcription Engines
+# -----------------------------------------------------------------------------
+
+class TranscriptionEngine:
+    """Turns one chunk of audio into text.
+
+    Implementations raise sr.UnknownValueError when nothing intelligible was
+    heard and sr.RequestError when the engine itself is unavailable.
+    """
+
+    name = ""
+
+    def transcribe(self, audio, language):
+        raise NotImplementedError
+
+class GoogleEngine(TranscriptionEngine):
+    """Google Web Speech API (needs network)."""
+
+    name = "google"
+
+    def transcribe(self, audio, language):
+        sr = _speech_recognition()
+        return sr.Recognizer().recognize_google(audio, language=language)
+
+class SphinxEngine(TranscriptionEngine):
+    """CMU PocketSphinx, fully offline (pip install pocketsphinx)."""
+
+    name = "sphinx"
+
+    def transcribe(self, audio, language):
+        sr = _speech_recognition()
+        return sr.Recognizer().recognize_sphinx(audio, language=language)
+
+class WhisperEngine(TranscriptionEngine):
+    """faster-whisper running locally (pip install faster-whisper).
+
+    The model is loaded once and shared by all worker threads.
+    """
+
+    name = "whisper"
+
+    def __init__(self, model_size=STT_WHISPER_MODEL):
+        self.model_size = model_size
+        self._model = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        with self._lock:
+            if self._model is None:
+                try:
+                    from faster_whisper import WhisperModel
+                except ImportError as e:
+                    raise _speech_recognition().RequestError("faster-whisper is not installed") from e
+                self._model = WhisperModel(self.model_size, device="cpu", compute_type="int8", num_workers=STT_WORKERS)
+            return self._model
+
+    def transcribe(self, audio, language):
+        samples = np.frombuffer(audio.get_raw_data(convert_rate=16000, convert_width=2), dtype=np.int16)
+        segments, _ = self._load().transcribe(samples.astype(np.float32) / 32768.0, language=language[:2])
+        text = " ".join(segment.text.strip() for segment in segments).strip()
+        if not text:
+            raise _speech_recognition().UnknownValueError()
+        return text
+
+ENGINES = {
+    "google": GoogleEngine,
+    "sphinx": SphinxEngine,
+    "whisper": WhisperEngine,
+}
+_engines = {}
+
+def get_engine(name=None):
+    """Return the shared engine instance for name (defaults to STT_ENGINE)."""
+    name = name or STT_ENGINE
+    if name not in _engines:
+        if name not in ENGINES:
+            raise ValueError(f"Unknown STT_ENGINE: {name}")
+        _engines[name] = ENGINES[name]()
+    return _engines[name]
+
+# -----------------------------------------------------------------------------
+# Preprocessing
+# -----------------------------------------------------------------------------
+
+def speech_spans(samples, rate=STT_SAMPLE_RATE, min_silence_ms=None):
+    """Sample ranges containing speech, found with a frame-energy detector.
+
+    Frames more than STT_VAD_MARGIN_DB above the noise floor (the quietest
+    tenth of the recording) are speech. Spans are padded so word edges
+    survive, and pauses left shorter than min_silence_ms are bridged.
+    """
+    min_silence_ms = STT_MIN_SILENCE_MS if min_silence_ms is None else min_silence_ms
+    frame = rate * _VAD_FRAME_MS // 1000
+    count = len(samples) // frame
+    if not count:
+        return []
+    frames = samples[:count * frame].astype(np.float32).reshape(count, frame)
+    energy = 10 * np.log10(np.mean(frames * frames, axis=1) + 1.0)
+    threshold = max(np.percentile(energy, 10) + STT_VAD_MARGIN_DB, energy.max() - 50)
+    speech = energy > threshold
+    if not speech.any():
+        return []
+    # Dilating the mask pads each span and bridges the short gaps in one step
+    reach = _VAD_PAD_MS // _VAD_FRAME_MS + min_silence_ms // (2 * _VAD_FRAME_MS)
+    speech = np.convolve(speech, np.ones(2 * reach + 1), mode="same") > 0
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], speech.astype(np.int8), [0]))))
+    shrink = (min_silence_ms // (2 * _VAD_FRAME_MS)) * frame
+    return [
+        (max(start * frame + (shrink if start else 0), 0), min(end * frame - (shrink if end < count else 0), len(samples)))
+        for start, end in zip(edges[::2], edges[1::2])
+    ]
+
+def preprocess_audio(audio_path):
+    """Decode any pydub-readable file to 16 kHz mono AudioData without dead air.
+
+    Leading and trailing silence is dropped and pauses longer than
+    STT_MAX_PAUSE_MS are shortened, so recognition time and upload size
+    follow the amount of speech. Returns None for a recording with no speech.
+    """
+    from pydub import AudioSegment
+    segment = AudioSegment.from_file(audio_path)
+    segment = segment.set_channels(1).set_frame_rate(STT_SAMPLE_RATE).set_sample_width(2)
+    samples = np.frombuffer(segment.raw_data, dtype=np.int16)
+    spans = speech_spans(samples, min_silence_ms=STT_MAX_PAUSE_MS)
+    if not spans:
+        return None
+    pause = np.zeros(STT_SAMPLE_RATE * STT_MAX_PAUSE_MS // 1000, dtype=np.int16)
+    pieces = []
+    for start, end in spans:
+        if pieces:
+            pieces.append(pause)
+        pieces.append(samples[start:end])
+    trimmed = np.concatenate(pieces)
+    logger.info("STT: %s trimmed from %.1fs to %.1fs", os.path.basename(audio_path),
+                len(samples) / STT_SAMPLE_RATE, len(trimmed) / STT_SAMPLE_RATE)
+    return _speech_recognition().AudioData(trimmed.tobytes(), STT_SAMPLE_RATE, 2)
+
+# -----------------------------------------------------------------------------
+# Chunked Transcription
+# -----------------------------------------------------------------------------
+
+def split_on_silence(audio, max_seconds=None):
+    """Split AudioData into chunks of at most max_seconds, cutting in pauses."""
+    max_ms = int((STT_CHUNK_SECONDS if max_seconds is None else max_seconds) * 1000)
+    rate = audio.sample_rate
+    samples = np.frombuffer(audio.get_raw_data(convert_width=2), dtype=np.int16)
+    if len(samples) * 1000 <= max_ms * rate:
+        return [audio]
+    spans = []
+    for start, end in speech_spans(samples, rate):
+        start, end = start * 1000 // rate, end * 1000 // rate
+        if spans and end - spans[-1][0] <= max_ms:
+            spans[-1][1] = end
+        else:
+            spans.append([start, end])
+    chunks = []
+    for start, end in spans:
+        # A single unbroken stretch of speech longer than the limit is cut evenly
+        for offset in range(start, end, max_ms):
+            chunks.append(audio.get_segment(offset, min(offset + max_ms, end)))
+    return chunks
+
+def _transcribe_chunk(engine, chunk, language):
+    sr = _speech_recognition()
+    try:
+        return engine.transcribe(chunk, language), None
+    except sr.UnknownValueError:
+        return "", None
+    except sr.RequestError as e:
+        return "", e
+
+@metrics.timed("transcribe_audio")
+def transcribe_audio(audio_path, language="🇬🇧 English", engine=None):
+    """Transcribe an audio file, trimming silence and splitting long recordings.
+
+    Chunks are transcribed in parallel on the STT worker pool and stitched
+    back together in order.
+    """
+    engine = get_engine(engine)
+    try:
+        audio = preprocess_audio(audio_path)
+    except Exception as e:
+        logger.warning("Could not decode %s: %s", audio_path, e)
+        metrics.fallback("stt_undecodable")
+        return "Cannot read voice"
+    if audio is None:
+        metrics.fallback("stt_no_speech")
+        return "Cannot read voice"
+    chunks = split_on_silence(audio)
+    stt_language = STT_LANGUAGES.get(language, "en-US")
+    if len(chunks) == 1:
+        results = [_transcribe_chunk(engine, chunks[0], stt_language)]
+    else:
+        results = list(_executor.map(lambda chunk: _transcribe_chunk(engine, chunk, stt_language), chunks))
+    text = " ".join(t for t, _ in results if t)
+    if text:
+        return text
+    errors = [e for _, e in results if e is not None]
+    if errors:
+        logger.warning("Transcription with %s failed: %s", engine.name, errors[0])
+        metrics.fallback("stt_unavailable")
+        return "Not available"
+    metrics.fallback("stt_no_speech")
+    return "Cannot read voice"
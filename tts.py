@@ -0,0 +1,288 @@
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# -----------------------------------------------------------------------------
+# Text-to-Speech Configuration
+# -----------------------------------------------------------------------------
+
+TTS_WORKERS = int(os.getenv("TTS_WORKERS", "4"))
+# Sentences after the first are grouped into segments of about this length
+TTS_SEGMENT_CHARS = int(os.getenv("TTS_SEGMENT_CHARS", "250"))
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", os.path.join(tempfile.gettempdir(), "insurebot-tts"))
+TTS_CACHE_MAX_MB = int(os.getenv("TTS_CACHE_MAX_MB", "256"))
+TTS_CACHE_MAX_AGE_HOURS = float(os.getenv("TTS_CACHE_MAX_AGE_HOURS", "168"))
+TTS_ENGINE = "gtts"
+
+TTS_LANGUAGES = {
+    "🇬🇧 English": "en",
+    "🇫🇷 Français": "fr"
+}
+
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?…:])\s+|\n{2,}")
+_MARKDOWN_RE = re.compile(r"[*_#`>|]+|^\s*[-+]\s+|\[([^\]]*)\]\([^)]*\)", re.MULTILINE)
+
+# gTTS is network-bound, so segments are synthesized on threads
+_executor = ThreadPoolExecutor(max_workers=TTS_WORKERS, thread_name_prefix="tts")
+
+# -----------------------------------------------------------------------------
+# Synthesis
+# -----------------------------------------------------------------------------
+
+def speakable(text):
+    """Strip Markdown markup that would otherwise be read aloud or mispronounced."""
+    return _MARKDOWN_RE.sub(lambda m: m.group(1) or "", text).strip()
+
+class TTSStore:
+    """Content-addressed directory of synthesized audio with size and age eviction.
+
+    Clips are keyed by hash(text, language, engine), so a repeated text is
+    served from disk without synthesis. Each clip is written to a temporary
+    file and renamed into place, and concurrent requests for the same text
+    wait for a single synthesis instead of racing.
+    """
+
+    def __init__(self, directory=TTS_CACHE_DIR, max_bytes=TTS_CACHE_MAX_MB << 20, max_age=TTS_CACHE_MAX_AGE_HOURS * 3600):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self._usage = None
+        self._last_scan = 0.0
+
+    def key(self, text, language, engine=TTS_ENGINE):
+        return hashlib.sha256(f"{engine}\0{language}\0{text}".encode("utf-8")).hexdigest()
+
+    def fetch(self, text, language, render, engine=TTS_ENGINE):
+        """Return the path of the clip for text, calling render(path) on a miss."""
+        key = self.key(text, language, engine)
+        path = os.path.join(self.directory, key + ".mp3")
+        with self._lock:
+            key_lock = self._inflight.setdefault(key, threading.Lock())
+        try:
+            with key_lock:
+                if os.path.exists(path):
+                    # Refresh the modification time so eviction is least-recently-used
+                    os.utime(path)
+                    with self._lock:
+                        self.hits += 1
+                    return path
+                os.makedirs(self.directory, exist_ok=True)
+                fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".part")
+                os.close(fd)
+                try:
+                    render(tmp_path)
+                    os.replace(tmp_path, path)
+                except BaseException:
+                    os.remove(tmp_path)
+                    raise
+                with self._lock:
+                    self.misses += 1
+                    if self._usage is not None:
+                        self._usage += os.path.getsize(path)
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+        self.evict()
+        return path
+
+    def evict(self, force=False):
+        """Remove expired clips, then least recently used ones beyond the size limit."""
+        now = time.time()
+        with self._lock:
+            # Scan when over the size limit, and every few minutes to expire old clips
+            if (not force and self._usage is not None and self._usage <= self.max_bytes
+                    and now - self._last_scan < 300):
+                return
+            self._last_scan = now
+        entries = []
+        try:
+            for entry in os.scandir(self.directory):
+                if entry.name.endswith(".mp3"):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        except FileNotFoundError:
+            pass  # Nothing synthesized yet
+        except OSError:
+            return
+        usage = sum(size for _, size, _ in entries)
+        removed = 0
+        for mtime, size, path in sorted(entries):
+            if usage <= self.max_bytes and now - mtime <= self.max_age:
+                break
+            try:
+                os.remove(path)
+                usage -= size
+                removed += 1
+            except OSError:
+                pass
+        with self._lock:
+            self._usage = usage
+            self.evictions += removed
+
+    def stats(self):
+        """Hit/miss counters and disk usage."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "disk_bytes": self._usage or 0,
+            }
+
+tts_store = TTSStore()
+# Measure the clips left by earlier runs, so disk usage is known before the first eviction
+_executor.submit(tts_store.evict, True)
+
+@metrics.timed("synthesize_speech")
+def synthesize_speech(text, language):
+    """Return the path of an MP3 clip for text, synthesizing it with gTTS on a miss (blocking)."""
+    from gtts import gTTS  # only needed once speech is first requested
+    lang = TTS_LANGUAGES.get(language, "en")
+    return tts_store.fetch(text, language, lambda path: gTTS(text, lang=lang).save(path))
+
+class SentenceSegmenter:
+    """Cut streamed text into speakable segments at sentence boundaries.
+
+    The first sentence is emitted on its own so audio can start as early as
+    possible; later sentences are grouped to about TTS_SEGMENT_CHARS so a long
+    answer does not turn into dozens of tiny clips.
+    """
+
+    def __init__(self, segment_chars=None):
+        self.segment_chars = TTS_SEGMENT_CHARS if segment_chars is None else segment_chars
+        self._text = ""
+        self._emitted = 0
+
+    def feed(self, fragment):
+        """Add streamed text; return any segments that are now complete."""
+        self._text += fragment
+        segments = []
+        while True:
+            ends = [m.end() for m in _SENTENCE_END_RE.finditer(self._text)]
+            if not ends:
+                break
+            if self._emitted:
+                # Group whole sentences up to the segment size
+                cut = next((end for end in ends if end >= self.segment_chars), None)
+                if cut is None:
+                    break
+            else:
+                cut = ends[0]
+            segments.append(self._text[:cut])
+            self._text = self._text[cut:]
+            self._emitted += 1
+        return [s for s in (speakable(s) for s in segments) if s]
+
+    def finish(self):
+        """Return whatever text remains once the stream has ended."""
+        rest, self._text = speakable(self._text), ""
+        return [rest] if rest else []
+
+# -----------------------------------------------------------------------------
+# Streaming Pipeline
+# -----------------------------------------------------------------------------
+
+class SpeechPipeline:
+    """Synthesize a streamed answer sentence by sentence while it is generated.
+
+    Segments are submitted to the TTS thread pool as soon as they are complete
+    and handed back strictly in order, forming a playlist whose first clip is
+    ready shortly after the first sentence.
+    """
+
+    def __init__(self, language, synthesize=synthesize_speech, segmenter=None):
+        self.language = language
+        self.synthesize = synthesize
+        self.segmenter = segmenter or SentenceSegmenter()
+        self.started = time.perf_counter()
+        self.first_audio = None
+        self._futures = []
+        self._delivered = 0
+
+    def feed(self, fragment):
+        for segment in self.segmenter.feed(fragment):
+            self._submit(segment)
+
+    def finish(self):
+        for segment in self.segmenter.finish():
+            self._submit(segment)
+
+    def ready(self):
+        """Audio paths finished since the last call, in order, without waiting."""
+        paths = []
+        while self._delivered < len(self._futures) and self._futures[self._delivered].done():
+            path = self._result(self._futures[self._delivered])
+            self._delivered += 1
+            if path:
+                paths.append(path)
+        return paths
+
+    async def remaining(self):
+        """Yield the rest of the audio paths in order as each one finishes."""
+        while self._delivered < len(self._futures):
+            future = self._futures[self._delivered]
+            try:
+                await asyncio.wrap_future(future)
+            except Exception:
+                pass
+            path = self._result(future)
+            self._delivered += 1
+            if path:
+                yield path
+
+    def _submit(self, segment):
+        self._futures.append(_executor.submit(self.synthesize, segment, self.language))
+
+    def _result(self, future):
+        try:
+            path = future.result()
+        except Exception as e:
+            logger.warning("TTS failed for a segment: %s", e)
+            metrics.fallback("tts_segment_failed")
+            return None
+        if self.first_audio is None:
+            self.first_audio = time.perf_counter() - self.started
+            logger.info("TTS: first audio %.2fs after the request started", self.first_audio)
+            metrics.observe("tts_first_audio", self.first_audio)
+        return path
+
+# -----------------------------------------------------------------------------
+# TTS Metrics
+# -----------------------------------------------------------------------------
+
+def register_metrics(store):
+    metrics.gauge(
+        "insurebot_tts_cache_bytes", "Disk used by cached speech clips.",
+        callback=lambda: {(): store.stats()["disk_bytes"]},
+    )
+    metrics.gauge(
+        "insurebot_tts_cache_lookups", "Speech clips served from the cache or synthesized.", ("result",),
+        callback=lambda: {"hit": store.hits, "miss": store.misses},
+    )
+    metrics.gauge(
+        "insurebot_tts_cache_hit_ratio", "Share of speech clips served from the cache.",
+        callback=lambda: {(): store.stats()["hit_rate"]},
+    )
+    metrics.gauge(
+        "insurebot_tts_cache_evictions", "Cached speech clips removed for age or size.",
+        callback=lambda: {(): store.evictions},
+    )
+
+register_metrics(tts_store)